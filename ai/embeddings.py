@@ -1,7 +1,10 @@
 # haval_insights/embeddings.py
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
+import queue
+import threading
+import time
 
 
 class BaseEmbedder(ABC):
@@ -27,3 +30,65 @@ class SentenceTransformerEmbedder(BaseEmbedder):
         # returns a list of Python lists (not numpy arrays) for compatibility
         vectors = self.model.encode(texts, convert_to_numpy=False)
         return [v.tolist() for v in vectors]
+
+
+class _PendingEmbedding:
+    __slots__ = ("text", "vector", "error", "done")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.vector: Optional[List[float]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class BatchingEmbedder(BaseEmbedder):
+    """
+    Micro-batching wrapper for query-time embedding.
+
+    Single-text calls made concurrently by different request threads are
+    collected for up to `window_seconds` and encoded in one model call.
+    Multi-text calls (ingestion) go straight to the wrapped embedder.
+    """
+    def __init__(self, inner: BaseEmbedder, window_seconds: float = 0.005, max_batch: int = 32):
+        self.inner = inner
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[_PendingEmbedding]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True, name="embed-batcher")
+        self._worker.start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) != 1:
+            return self.inner.embed(texts)
+
+        pending = _PendingEmbedding(texts[0])
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return [pending.vector]
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self.inner.embed([p.text for p in batch])
+                for pending, vector in zip(batch, vectors):
+                    pending.vector = vector
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
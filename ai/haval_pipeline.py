@@ -17,10 +17,11 @@ from ai.io_utils import load_raw_posts_from_json
 from ai.text_cleaning import raw_to_clean_posts
 from ai.reply_merge import group_posts_into_conversation_blocks
 from ai.time_analytics import compute_daily_stats, compute_weekly_stats
-from ai.embeddings import SentenceTransformerEmbedder
+from ai.embeddings import SentenceTransformerEmbedder, BatchingEmbedder
 from ai.vector_store import ChromaVectorStore
 from ai.llm_client import GeminiClient, GrokClient
 from ai.rag_engine import RAGEngine
+from ai.response_cache import get_response_cache
 from ai.enrichment import (
     classify_blocks,
     compute_enrichment_metrics,
@@ -78,8 +79,9 @@ Path("data").mkdir(parents=True, exist_ok=True)
 
 STATE_FILE = Path("data") / "haval_h6_pipeline_state.pkl"
 
-# Global embedder (shared across all companies)
-embedder = SentenceTransformerEmbedder()
+# Global embedder (shared across all companies); concurrent query embeddings
+# from different requests are encoded together in one model call
+embedder = BatchingEmbedder(SentenceTransformerEmbedder())
 print("[HavalPipeline] Embedder initialized.")
 
 # Initialize default Haval vector stores (backward compatibility)
@@ -857,6 +859,9 @@ def _run_pipeline(json_path: str, topic_url: str, sources: str, company_id: str
             logger.warning(f"[HavalPipeline] Block separation failed: {mix_error}")
             # Don't fail the entire pipeline for this, just log the warning
 
+        # Answers cached before this run were built from the old data
+        get_response_cache().invalidate_company(company_id)
+
         print("[HavalPipeline] Pipeline completed successfully.")
         logger.info("[HavalPipeline] Pipeline completed successfully.")
 
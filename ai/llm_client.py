@@ -1,7 +1,7 @@
 # haval_insights/llm_client.py
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any, Optional, List, Dict, Union
+from typing import Any, Optional, List, Dict, Union, Iterator
 
 
 class LLMResponse:
@@ -19,6 +19,25 @@ class BaseLLMClient(ABC):
     ) -> LLMResponse:
         ...
 
+    def stream(
+        self,
+        prompt: Union[List[Dict[str, str]], str],
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Yield the response text incrementally.
+
+        Default implementation yields the full generate() result once;
+        clients with native streaming support override this.
+        """
+        content = self.generate(prompt, **kwargs).content
+        if content:
+            yield content
+
+    def warm_up(self) -> bool:
+        """Pre-establish connections to the provider. No-op unless overridden."""
+        return False
+
 
 class GeminiClient(BaseLLMClient):
     """
@@ -105,6 +124,31 @@ class GeminiClient(BaseLLMClient):
             return ""
 
 
+_http_client = None
+
+
+def _pooled_http_client():
+    """
+    Shared keep-alive HTTP client for OpenAI-compatible clients.
+
+    Returns None (letting the SDK build its own client) if httpx is unavailable.
+    """
+    global _http_client
+    if _http_client is None:
+        try:
+            import httpx  # type: ignore
+        except ImportError:
+            return None
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_keepalive_connections=64,
+                max_connections=128,
+                keepalive_expiry=300,
+            ),
+        )
+    return _http_client
+
+
 class GrokClient(BaseLLMClient):
     def __init__(
         self,
@@ -124,8 +168,18 @@ class GrokClient(BaseLLMClient):
         self._client = OpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
+            http_client=_pooled_http_client(),
         )
 
+    def warm_up(self) -> bool:
+        """Open a pooled connection to the API so the first real request skips the TLS handshake."""
+        try:
+            self._client.models.list()
+            return True
+        except Exception as e:
+            print(f"LLM warm-up failed (Grok): {e}")
+            return False
+
     def generate(
         self,
         prompt: Union[List[Dict[str, str]], str],
@@ -156,6 +210,27 @@ class GrokClient(BaseLLMClient):
         # print(f"LLM extracted text (Grok):\n{text}")
         return LLMResponse(content=text, raw=resp)
 
+    def stream(
+        self,
+        prompt: Union[List[Dict[str, str]], str],
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """Stream content deltas from the OpenAI-compatible API as they arrive."""
+        messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+        response = self._client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=kwargs.get("temperature", self.temperature),
+            max_tokens=kwargs.get("max_tokens", 2048),
+            stream=True,
+        )
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
     def _extract_text(self, resp: Any) -> str:
         """
         Safely extract text from an OpenAI-compatible ChatCompletion response.
@@ -286,6 +361,12 @@ class FallbackLLMClient(BaseLLMClient):
                 print(f"[Fallback] {self.primary_name} non-recoverable error: {error_str[:100]}")
                 return LLMResponse(content="", raw=e)
 
+    def warm_up(self) -> bool:
+        """Warm both clients so a fallback switch is as fast as the primary path."""
+        primary_ok = self.primary.warm_up()
+        fallback_ok = self.fallback.warm_up()
+        return primary_ok or fallback_ok
+
     def _should_fallback(self, error_str: str) -> bool:
         """Check if error warrants fallback (429, 503, connection errors)."""
         fallback_indicators = [
@@ -0,0 +1,220 @@
+"""
+Response Cache
+
+Redis-backed exact-match cache for complete chatbot answers.
+Identical (mode, company, query, short-history) tuples are answered from
+Redis and replayed as a synthetic stream instead of calling the LLM again.
+
+Features:
+- blake2b fingerprint of normalized query + recent history
+- Shared across Gunicorn workers via Redis
+- TTL-based expiry (default: 1 hour)
+- Per-company invalidation when a company's data is re-indexed
+- Fails open: if Redis is unavailable, caching is silently disabled
+- In-flight coalescing: concurrent identical requests share one computation
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, List, Dict, Optional
+import hashlib
+import os
+import threading
+
+# Redis is optional for this cache - the chatbot works without it
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+
+class ResponseCache:
+    """
+    Exact-match answer cache keyed by a request fingerprint.
+
+    Only the last `history_window` messages take part in the fingerprint, so
+    first-turn questions ("hello", "what warranty?") hit across sessions while
+    follow-ups stay tied to their conversation context.
+    """
+
+    def __init__(
+        self,
+        redis_host: str = "localhost",
+        redis_port: int = 6379,
+        redis_db: int = 0,
+        redis_password: Optional[str] = None,
+        ttl_seconds: int = 3600,  # 1 hour
+        history_window: int = 4,  # Last 4 messages (2 rounds)
+    ):
+        """
+        Initialize response cache with Redis backend.
+
+        Args:
+            redis_host: Redis server hostname
+            redis_port: Redis server port
+            redis_db: Redis database number (0-15)
+            redis_password: Redis password (if authentication enabled)
+            ttl_seconds: Expiration time for cached answers in seconds
+            history_window: Number of trailing history messages in the fingerprint
+        """
+        self.ttl_seconds = ttl_seconds
+        self.history_window = history_window
+        self.redis_client = None
+
+        if not HAS_REDIS:
+            print("[ResponseCache] Warning: redis not installed, response cache disabled")
+            return
+
+        try:
+            client = redis.Redis(
+                host=redis_host,
+                port=redis_port,
+                db=redis_db,
+                password=redis_password,
+                socket_connect_timeout=1,
+                socket_timeout=1,
+            )
+            client.ping()
+            self.redis_client = client
+            print(f"[ResponseCache] Connected to Redis at {redis_host}:{redis_port}")
+        except redis.RedisError as e:
+            print(f"[ResponseCache] Redis unavailable, response cache disabled: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis_client is not None
+
+    def make_key(
+        self,
+        mode: str,
+        company_id: str,
+        query: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        thinking_mode: bool = False,
+    ) -> str:
+        """Build the cache key for a request"""
+        normalized_query = " ".join(query.lower().split())
+        history_fingerprint = ""
+        if history:
+            tail = history[-self.history_window:]
+            history_fingerprint = hashlib.blake2b(
+                "\x1e".join(f"{m.get('role')}:{m.get('content')}" for m in tail).encode("utf-8"),
+                digest_size=16,
+            ).hexdigest()
+
+        raw = f"{mode}|{company_id}|{int(bool(thinking_mode))}|{normalized_query}|{history_fingerprint}"
+        # The company stays readable in the key so invalidate_company() can find its answers
+        return self._company_prefix(company_id) + hashlib.blake2b(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _company_prefix(company_id: str) -> str:
+        return f"chat:answer:{company_id}:"
+
+    def invalidate_company(self, company_id: str) -> int:
+        """Drop every cached answer for a company (e.g. after its data was re-indexed)"""
+        if self.redis_client is None:
+            return 0
+        deleted = 0
+        try:
+            batch = []
+            for key in self.redis_client.scan_iter(match=self._company_prefix(company_id) + "*", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    deleted += self.redis_client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.delete(*batch)
+        except redis.RedisError as e:
+            print(f"[ResponseCache] Invalidation failed for {company_id}: {e}")
+        return deleted
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached answer for a key, or None on miss/error"""
+        if self.redis_client is None:
+            return None
+        try:
+            cached = self.redis_client.get(key)
+        except redis.RedisError as e:
+            print(f"[ResponseCache] Lookup failed: {e}")
+            return None
+        return cached.decode("utf-8") if cached else None
+
+    def set(self, key: str, answer: str) -> None:
+        """Store a complete answer under a key with the configured TTL"""
+        if self.redis_client is None or not answer:
+            return
+        try:
+            self.redis_client.setex(key, self.ttl_seconds, answer.encode("utf-8"))
+        except redis.RedisError as e:
+            print(f"[ResponseCache] Store failed: {e}")
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Return the process-wide ResponseCache, creating it on first use.
+
+    Reads from environment variables:
+    - REDIS_HOST (default: "localhost")
+    - REDIS_PORT (default: 6379)
+    - REDIS_PASSWORD (default: None)
+    - REDIS_DB (default: 0)
+    - RESPONSE_CACHE_TTL (default: 3600)
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            redis_host=os.getenv("REDIS_HOST", "localhost"),
+            redis_port=int(os.getenv("REDIS_PORT", "6379")),
+            redis_db=int(os.getenv("REDIS_DB", "0")),
+            redis_password=os.getenv("REDIS_PASSWORD"),
+            ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        )
+    return _response_cache
+
+
+class _InflightCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_inflight: Dict[str, _InflightCall] = {}
+_inflight_lock = threading.Lock()
+
+
+def coalesce_inflight(key: str, fn: Callable[[], Any]) -> Any:
+    """
+    Run fn() once per key among concurrent callers.
+
+    The first caller for a key computes the result; callers arriving while it is
+    still running wait and share its result (or exception) instead of repeating
+    the work. Nothing is retained once the call finishes - use ResponseCache for that.
+    """
+    with _inflight_lock:
+        call = _inflight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _inflight[key] = _InflightCall()
+
+    if not is_leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.done.set()
@@ -3,10 +3,13 @@ import secrets
 import logging
 import queue
 import json
+import socket
 import sys
+import threading
 from datetime import timedelta, datetime
 from flask import Flask, Response,render_template,jsonify
 from flask_login import LoginManager, login_required, current_user
+from werkzeug.serving import WSGIRequestHandler
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -203,6 +206,18 @@ class StdoutCapture:
         return getattr(self.original_stream, name)
 
 
+class NoDelayRequestHandler(WSGIRequestHandler):
+    """Request handler that disables Nagle's algorithm on client sockets
+    so small SSE frames are sent immediately instead of being coalesced"""
+    
+    def setup(self):
+        super().setup()
+        try:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, AttributeError):
+            pass  # Not a TCP socket (e.g. unix socket)
+
+
 # Set up log capture
 log_capture = LogCapture()
 log_capture.setLevel(logging.INFO)
@@ -1014,9 +1029,18 @@ if __name__ == "__main__":
     server_logger.info(f"Threading: {server_config.get('threaded', True)}")
     server_logger.info("="*70)
     
+    # Open pooled keep-alive connections to the Insights LLM in the background
+    # so the first chat request doesn't pay the TCP+TLS handshake
+    def _prewarm_llm_connections():
+        client = get_openai_client()
+        if client and client.warm_up():
+            server_logger.info("Insights LLM connections prewarmed")
+
+    threading.Thread(target=_prewarm_llm_connections, daemon=True, name="llm-prewarm").start()
+
     try:
         # Start Flask application with configuration
-        app.run(**server_config)
+        app.run(request_handler=NoDelayRequestHandler, **server_config)
     except KeyboardInterrupt:
         server_logger.info("Server shutdown requested")
         # Restore original stdout/stderr
@@ -6,6 +6,7 @@ Loads settings from config.yml and provides easy access to configuration values.
 import yaml
 import os
 import secrets
+import itertools
 from datetime import datetime
 from typing import Dict, Any, Optional
 from utils.logger import server_logger
@@ -17,6 +18,9 @@ class ConfigLoader:
     def __init__(self, config_file: str = "config/config.yml"):
         self.config_file = config_file
         self.config = {}
+        # Bumped on every change so callers can memoize values derived from the config
+        self._versions = itertools.count(1)
+        self._version = 0
         self._load_config()
         self._validate_config()
         self._setup_defaults()
@@ -57,6 +61,7 @@ class ConfigLoader:
     
     def _setup_defaults(self):
         """Setup default values and auto-generated settings"""
+        self.touch()
         # Generate secret key if not provided
         if not self.get('server.secret_key'):
             secret_key = secrets.token_hex(32)
@@ -114,6 +119,11 @@ class ConfigLoader:
         
         # Set the value
         config[keys[-1]] = value
+        self.touch()
+    
+    def touch(self) -> None:
+        """Mark the configuration as changed (call after editing self.config directly)"""
+        self._version = next(self._versions)
     
     def save(self) -> bool:
         """Save current configuration to file"""
@@ -123,6 +133,7 @@ class ConfigLoader:
             
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 yaml.dump(self.config, f, default_flow_style=False, indent=2, sort_keys=False)
+            self.touch()
             
             server_logger.info(f"Configuration saved to {self.config_file}")
             return True
@@ -135,6 +146,7 @@ class ConfigLoader:
         self._load_config()
         self._validate_config()
         self._setup_defaults()
+        self.touch()
         server_logger.info("Configuration reloaded")
     
     def get_flask_config(self) -> Dict[str, Any]:
@@ -145,6 +157,9 @@ class ConfigLoader:
             'TESTING': False,
             'PERMANENT_SESSION_LIFETIME': self.get('server.session_timeout', 3600),
             'SESSION_PERMANENT': self.get('server.permanent_session', False),
+            # Don't re-sign and re-send the session cookie on responses that didn't change it
+            'SESSION_REFRESH_EACH_REQUEST': self.get('server.session_refresh_each_request', False),
+            'USE_X_SENDFILE': self.get('server.use_x_sendfile', False),
             'MAX_CONTENT_LENGTH': self.get('uploads.max_file_size', 52428800),
             'UPLOAD_FOLDER': self.get('uploads.upload_dir', 'uploads'),
         }
@@ -209,9 +224,9 @@ class ConfigLoader:
         """Export configuration for settings page (excluding sensitive data)"""
         config_copy = self.config.copy()
         
-        # Remove sensitive information
+        # Remove sensitive information (on a copy of the section, not the live config)
         if 'server' in config_copy and 'secret_key' in config_copy['server']:
-            config_copy['server']['secret_key'] = '***HIDDEN***'
+            config_copy['server'] = {**config_copy['server'], 'secret_key': '***HIDDEN***'}
         
         return config_copy
     
@@ -223,6 +238,7 @@ class ConfigLoader:
                     self.set(key, value)
             
             self._validate_config()
+            self.touch()
             return self.save()
         except Exception as e:
             server_logger.error(f"Error updating configuration: {e}")
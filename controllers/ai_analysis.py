@@ -133,8 +133,9 @@ def extract_structured_data(answer: str, platform_data: Optional[List[Dict]], mo
             })
     
     # Extract chart definitions from markdown code blocks
+    # Cheap substring checks gate each regex pass; plain conversational answers skip them all
     chart_pattern = r'```chart\s*\n([\s\S]*?)```'
-    charts = re.findall(chart_pattern, answer)
+    charts = re.findall(chart_pattern, answer) if '```chart' in answer else []
     for chart_code in charts:
         try:
             lines = chart_code.strip().split('\n')
@@ -163,7 +164,7 @@ def extract_structured_data(answer: str, platform_data: Optional[List[Dict]], mo
     
     # Extract tables from markdown
     table_pattern = r'\|(.+)\|\n\|[-\s|]+\|\n((?:\|.+\|\n?)+)'
-    tables = re.findall(table_pattern, answer)
+    tables = re.findall(table_pattern, answer) if '|' in answer else []
     for header, rows in tables:
         try:
             headers = [h.strip() for h in header.split('|') if h.strip()]
@@ -184,14 +185,17 @@ def extract_structured_data(answer: str, platform_data: Optional[List[Dict]], mo
     
     # Extract recommendations section
     rec_pattern = r'(?:###?\s*)?(?:💡\s*)?(?:Recommendations?|Suggestions?|Action Items?)[:\s]*\n((?:[-*•]\s*.+\n?)+)'
-    rec_match = re.search(rec_pattern, answer, re.IGNORECASE | re.MULTILINE)
+    answer_lower = answer.lower()
+    rec_match = None
+    if any(marker in answer_lower for marker in ('recommendation', 'suggestion', 'action item')):
+        rec_match = re.search(rec_pattern, answer, re.IGNORECASE | re.MULTILINE)
     if rec_match:
         rec_text = rec_match.group(1)
         recommendations = [r.strip().lstrip('-*• ') for r in rec_text.split('\n') if r.strip()]
         structured["recommendations"] = recommendations
     else:
         # If no explicit recommendations section found, generate some based on the content
-        if any(word in answer.lower() for word in ['problem', 'issue', 'concern', 'fault']):
+        if any(word in answer_lower for word in ['problem', 'issue', 'concern', 'fault']):
             structured["recommendations"] = [
                 "Consider researching these specific issues before making a decision",
                 "Check warranty coverage for common problems mentioned",
@@ -1,11 +1,141 @@
-from flask import render_template, request, jsonify, session
+from flask import Response, render_template, request, jsonify, session
 from flask_login import current_user, login_required
-from models.chat import save_user_chat_history
-from controllers.ai_analysis import extract_structured_data
+from models.chat import (
+    get_user_chat_history_page, save_user_chat_history,
+)
+from models.database import get_db_connection
+from controllers.ai_analysis import extract_structured_data, ai_analyze_query
+from services.ai_service import AIService
 from datetime import datetime
 from utils.logger import chat_logger, ai_logger, log_function_call, log_user_action, log_error, log_ai_activity
+from ai.response_cache import get_response_cache, coalesce_inflight
+from config import get_company_config
+import json
+import re
+import queue
 import secrets
+import threading
 import time
+import traceback
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Most recent exchanges of a chat session passed to the answer pipelines
+# (the RAG context selector looks at no more than the last 10 messages)
+CHAT_HISTORY_EXCHANGES = 10
+
+# Keep proxies (nginx etc.) from buffering or caching token-by-token SSE output
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+# CHART_PLACEHOLDER_<n> markers (optionally wrapped in __) that the LLM may echo back
+_CHART_RE = re.compile(r'_{0,2}CHART_PLACEHOLDER_\d+_{0,2}')
+_TRIPLE_NL_RE = re.compile(r'\n\s*\n\s*\n')
+
+
+def _strip_chart_placeholders(text):
+    """Remove chart placeholders and collapse the blank lines they leave behind"""
+    return _TRIPLE_NL_RE.sub('\n\n', _CHART_RE.sub('', text)).strip()
+
+
+# Pipeline status snapshot shared by chat requests: (expires_at, status)
+PIPELINE_STATUS_TTL = 2.0
+_pipeline_status_snapshot = (0.0, None)
+
+
+def _get_pipeline_status():
+    """Return the pipeline status, refreshing it at most every PIPELINE_STATUS_TTL seconds"""
+    global _pipeline_status_snapshot
+    expires_at, status = _pipeline_status_snapshot
+    now = time.monotonic()
+    if status is None or now >= expires_at:
+        from ai.haval_pipeline import get_pipeline_status
+        status = get_pipeline_status()
+        _pipeline_status_snapshot = (now + PIPELINE_STATUS_TTL, status)
+    return status
+
+
+# AI activity logs are handed to a background worker so answers are returned without
+# waiting on them. Chat history is still written before the answer is sent: the
+# next turn of the session reads it.
+_persist_q = queue.Queue(maxsize=1000)
+_persist_worker = None
+_persist_worker_lock = threading.Lock()
+
+
+def _persist_loop():
+    while True:
+        fn, args = _persist_q.get()
+        try:
+            fn(*args)
+        except Exception as e:
+            log_error(e, f"Background {getattr(fn, '__name__', fn)} failed")
+        finally:
+            _persist_q.task_done()
+
+
+def _persist_later(fn, *args):
+    """Queue fn(*args) for the background worker; drops (and logs) the call if the queue is full"""
+    global _persist_worker
+    if _persist_worker is None:
+        with _persist_worker_lock:
+            if _persist_worker is None:
+                _persist_worker = threading.Thread(target=_persist_loop, daemon=True, name="chat-persist")
+                _persist_worker.start()
+    try:
+        _persist_q.put_nowait((fn, args))
+    except queue.Full:
+        chat_logger.warning(f"Persist queue full, dropping {getattr(fn, '__name__', fn)} call")
+
+
+def _precheck(mode, user_company):
+    """
+    Validate a streaming request before any SSE response is opened.
+
+    Returns (status_code, message) when the request can't be served, otherwise None.
+    The checks inside the stream generators remain as a fallback.
+    """
+    if mode == "insights":
+        import app
+        if not app.get_openai_client():
+            return 503, "Insights mode is not available."
+        return None
+    
+    if mode in ("dealership", "facebook_beta"):
+        return None
+    
+    company_config = get_company_config(user_company)
+    if mode == "whatsapp" and not company_config.has_whatsapp:
+        return 400, (f"WhatsApp data is not available for {company_config.name}. "
+                     f"Please select PakWheels or Insights mode.")
+    if mode == "pakwheels" and not company_config.has_pakwheels:
+        return 400, (f"PakWheels data is not available for {company_config.name}. "
+                     f"Please select a different data source.")
+    
+    try:
+        from ai.haval_pipeline import get_rag_engine
+        rag = get_rag_engine(company_id=user_company)
+    except Exception as e:
+        log_error(e, f"Failed to get RAG engine for {user_company}")
+        rag = None
+    if rag is None:
+        return 503, f"The {company_config.name} insight engine is not available yet."
+    return None
+
+
+def _get_chat_session_id():
+    """Return the chat session id; the session is only written when a new id is issued"""
+    session_id = session.get('chat_session_id')
+    if not session_id:
+        session_id = secrets.token_hex(16)
+        session['chat_session_id'] = session_id
+    return session_id
 
 
 def extract_text_from_llm_response(response):
@@ -19,11 +149,131 @@ def extract_text_from_llm_response(response):
     return response
 
 
+# Streamed deltas are grouped into one SSE frame once this many characters are
+# buffered or this long has passed since the last frame
+SSE_COALESCE_CHARS = 64
+SSE_COALESCE_SECONDS = 0.015
+
+
+def _coalesce_deltas(deltas, max_chars=SSE_COALESCE_CHARS, max_delay=SSE_COALESCE_SECONDS):
+    """Join small streamed deltas into larger chunks, always flushing the remainder"""
+    buf = []
+    size = 0
+    last_flush = time.monotonic()
+    for delta in deltas:
+        if not delta:
+            continue
+        buf.append(delta)
+        size += len(delta)
+        now = time.monotonic()
+        if size >= max_chars or now - last_flush >= max_delay:
+            yield "".join(buf)
+            buf = []
+            size = 0
+            last_flush = now
+    if buf:
+        yield "".join(buf)
+
+
+def _openai_deltas(response):
+    """
+    Text deltas of an OpenAI chat completion stream. Chunks without choices
+    (usage / keep-alive) are skipped; the stream is closed when this generator
+    finishes or is closed.
+    """
+    try:
+        for chunk in response:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content
+    finally:
+        getattr(response, "close", lambda: None)()
+
+
+_STREAM_DONE = object()
+
+
+def _prefetch(iterable, maxsize=64):
+    """
+    Drain `iterable` on a worker thread into a bounded queue, so the next tokens are
+    generated while earlier ones are being sent. Producer errors are re-raised here;
+    closing the generator (client disconnect) stops the worker.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((_STREAM_DONE, e))
+            return
+        finally:
+            # Release the upstream stream (and its pooled HTTP connection) now,
+            # not at garbage collection, when the client went away mid-answer
+            try:
+                getattr(iterable, "close", lambda: None)()
+            except Exception as e:
+                log_error(e, "Closing prefetched stream failed")
+        put((_STREAM_DONE, None))
+
+    threading.Thread(target=producer, daemon=True, name="stream-prefetch").start()
+    try:
+        while True:
+            item, error = q.get()
+            if item is _STREAM_DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _sse(content):
+    """Build a `done: false` SSE frame; only the content string is JSON-encoded"""
+    if HAS_ORJSON:
+        encoded = orjson.dumps(content)
+    else:
+        encoded = json.dumps(content).encode('utf-8')
+    return b'data: {"content":' + encoded + b',"done":false}\n\n'
+
+
+_WORD_RE = re.compile(r'\S+\s*')
+
+
+def _sse_stream_words(text, chunk_size=10):
+    """Replay a complete answer as SSE frames of `chunk_size` words, slicing the original text"""
+    start = None
+    end = 0
+    count = 0
+    for match in _WORD_RE.finditer(text):
+        if start is None:
+            start = match.start()
+        end = match.end()
+        count += 1
+        if count == chunk_size:
+            yield _sse(text[start:end])
+            start = None
+            count = 0
+    if start is not None:
+        yield _sse(text[start:end])
+
+
 @log_function_call(chat_logger)
 def chatbot():
     """Chatbot interface - advanced AI copilot chatbot"""
     try:
-        from config import get_company_config
         company_config = get_company_config(current_user.company_id)
         company_name = company_config.full_name
         chat_logger.info(f"Chatbot interface accessed by user {current_user.username} for company {company_name}")
@@ -41,8 +291,6 @@ def chatbot():
 @log_function_call(chat_logger)
 def chatbot_advanced():
     """Advanced AI copilot chatbot interface"""
-    from config import get_company_config
-    
     try:
         company_config = get_company_config(current_user.company_id)
         company_name = company_config.full_name
@@ -70,15 +318,11 @@ def chatbot_advanced():
 @log_function_call(chat_logger, log_args=False)  # Don't log full query content
 def chatbot_query_stream():
     """Process chatbot queries with streaming responses"""
-    from flask import Response
-    import json
     
     try:
-        # Check if user is authenticated
+        # Reject unauthenticated requests outright instead of opening an SSE stream
         if not current_user.is_authenticated:
-            def auth_error():
-                yield f"data: {json.dumps({'content': 'Please log in to use the chatbot.', 'done': True, 'error': 'authentication_required'})}\n\n"
-            return Response(auth_error(), mimetype='text/event-stream')
+            return jsonify({'error': 'authentication_required'}), 401
         
         data = request.get_json(force=True) or {}
         query = (data.get("query") or "").strip()
@@ -93,16 +337,21 @@ def chatbot_query_stream():
                     yield f"data: {json.dumps({'content': 'Hello! How can I help you today?', 'done': True})}\n\n"
                 else:
                     yield f"data: {json.dumps({'content': 'Please ask something about your vehicle, concerns, or the available data.', 'done': True})}\n\n"
-            return Response(empty_response(), mimetype='text/event-stream')
+            return Response(empty_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
         # Get user's company
         user_company = current_user.company_id or 'haval'
         
+        # Known failures get a plain JSON status instead of a one-frame SSE stream
+        failure = _precheck(mode, user_company)
+        if failure:
+            status_code, message = failure
+            return jsonify({"answer": message}), status_code
+        
         # Get or create session ID
-        session_id = session.get('chat_session_id')
-        if not session_id:
-            session_id = secrets.token_hex(16)
-            session['chat_session_id'] = session_id
+        session_id = _get_chat_session_id()
+        
+        response_cache = get_response_cache()
         
         def generate_response():
             try:
@@ -115,13 +364,12 @@ def chatbot_query_stream():
                         return
                     
                     try:
-                        from models.chat import get_user_chat_history
-                        history = get_user_chat_history(current_user.id, mode, session_id)
+                        history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES)
                         
                         messages = [{"role": "system", "content": "You are ChatGPT, a helpful AI assistant."}]
                         
                         if history:
-                            for msg in history[-20:]:
+                            for msg in history:
                                 if msg.get('role') in ['user', 'assistant']:
                                     content = msg['content'].strip()
                                     if content:
@@ -129,8 +377,14 @@ def chatbot_query_stream():
                         
                         messages.append({"role": "user", "content": query})
                         
+                        # Replay identical (mode, company, query, recent history) answers from cache
+                        cache_key = response_cache.make_key(mode, user_company, query, history, thinking_mode)
+                        cached_answer = response_cache.get(cache_key)
+                        if cached_answer is not None:
+                            full_answer = cached_answer
+                            yield from _sse_stream_words(full_answer, chunk_size=8)
                         # Check if this is a GrokClient or actual OpenAI client
-                        if hasattr(openai_client, 'chat') and hasattr(openai_client.chat, 'completions'):
+                        elif hasattr(openai_client, 'chat') and hasattr(openai_client.chat, 'completions'):
                             # This is an actual OpenAI client with streaming support
                             response = openai_client.chat.completions.create(
                                 model="gpt-4o",
@@ -140,35 +394,24 @@ def chatbot_query_stream():
                                 stream=True
                             )
                             
-                            full_answer = ""
-                            for chunk in response:
-                                if chunk.choices[0].delta.content:
-                                    content = chunk.choices[0].delta.content
-                                    full_answer += content
-                                    yield f"data: {json.dumps({'content': content, 'done': False})}\n\n"
+                            # Empty/None deltas (role and finish chunks) are dropped by _coalesce_deltas
+                            parts = []
+                            deltas = _prefetch(_openai_deltas(response))
+                            for content in _coalesce_deltas(deltas):
+                                parts.append(content)
+                                yield _sse(content)
+                            full_answer = "".join(parts)
                         else:
-                            # This is a GrokClient, use generate method and simulate streaming
-                            prompt_parts = []
-                            for msg in messages:
-                                if msg['role'] == 'system':
-                                    prompt_parts.append(f"System: {msg['content']}")
-                                elif msg['role'] == 'user':
-                                    prompt_parts.append(f"User: {msg['content']}")
-                                elif msg['role'] == 'assistant':
-                                    prompt_parts.append(f"Assistant: {msg['content']}")
-                            
-                            prompt = "\n\n".join(prompt_parts) + "\n\nAssistant:"
-                            llm_response = openai_client.generate(prompt, max_tokens=2000, temperature=0.7)
-                            full_answer = extract_text_from_llm_response(llm_response)
-                            
-                            # Simulate streaming by sending words in chunks
-                            words = full_answer.split()
-                            chunk_size = 8
-                            for i in range(0, len(words), chunk_size):
-                                chunk = " ".join(words[i:i+chunk_size])
-                                if i + chunk_size < len(words):
-                                    chunk += " "
-                                yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                            # This is a wrapped LLM client (GrokClient etc.) - stream its deltas
+                            # through the shared client so tokens reach the user as they are generated
+                            parts = []
+                            for content in _coalesce_deltas(_prefetch(openai_client.stream(messages, max_tokens=2000, temperature=0.7))):
+                                parts.append(content)
+                                yield _sse(content)
+                            full_answer = "".join(parts)
+                        
+                        if cached_answer is None:
+                            response_cache.set(cache_key, full_answer)
                         
                         save_user_chat_history(current_user.id, session_id, mode, query, full_answer)
                         structured_data = extract_structured_data(full_answer, None, mode)
@@ -183,28 +426,19 @@ def chatbot_query_stream():
                     # Dealership Database Mode - LLM-powered SQL queries
                     try:
                         from ai.dealership_engine import DealershipPipeline
-                        from models.chat import get_user_chat_history
 
                         # Initialize dealership pipeline
                         dealership_pipeline = DealershipPipeline()
 
                         # Get chat history (already uses existing intent classifier for follow-ups)
-                        history = get_user_chat_history(current_user.id, mode, session_id)
-                        if len(history) == 0:
-                            history = None
+                        history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES) or None
 
                         # Get answer from dealership pipeline
                         chat_logger.info(f"Dealership query from {current_user.username}: {query[:100]}")
                         answer = dealership_pipeline.answer(query, chat_history=history)
 
                         # Stream answer in chunks
-                        words = answer.split()
-                        chunk_size = 10
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                        yield from _sse_stream_words(answer)
 
                         # Save to chat history
                         save_user_chat_history(current_user.id, session_id, mode, query, answer)
@@ -214,27 +448,19 @@ def chatbot_query_stream():
 
                     except Exception as e:
                         chat_logger.error(f"Dealership pipeline error: {str(e)}")
-                        import traceback
                         traceback.print_exc()
                         yield f"data: {json.dumps({'content': f'Sorry, dealership query failed. Please try rephrasing your question.', 'done': True})}\n\n"
 
                 elif mode == "facebook_beta":
                     # Facebook Beta Mode - Process Facebook group data with advanced filtering
                     try:
-                        from services.ai_service import AIService
 
                         # Get answer from AI service Facebook query processor
                         chat_logger.info(f"Facebook Beta query from {current_user.username}: {query[:100]}")
                         answer = AIService.process_chat_query(query, mode, user_company)
 
                         # Stream answer in chunks
-                        words = answer.split()
-                        chunk_size = 10
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                        yield from _sse_stream_words(answer)
 
                         # Save to chat history
                         save_user_chat_history(current_user.id, session_id, mode, query, answer)
@@ -244,16 +470,9 @@ def chatbot_query_stream():
 
                     except Exception as e:
                         chat_logger.error(f"Facebook Beta processing error: {str(e)}")
-                        import traceback
                         traceback.print_exc()
                         yield f"data: {json.dumps({'content': f'Sorry, Facebook Beta query failed. Please try rephrasing your question.', 'done': True})}\n\n"
-                        words = answer.split()
-                        chunk_size = 10
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                        yield from _sse_stream_words(answer)
 
                         # Save to chat history
                         save_user_chat_history(current_user.id, session_id, mode, query, answer)
@@ -263,27 +482,19 @@ def chatbot_query_stream():
 
                     except Exception as e:
                         chat_logger.error(f"Dealership pipeline error: {str(e)}")
-                        import traceback
                         traceback.print_exc()
                         yield f"data: {json.dumps({'content': f'Sorry, dealership query failed. Please try rephrasing your question.', 'done': True})}\n\n"
 
                 elif mode == "facebook_beta":
                     # Facebook Beta Mode - Process Facebook group data with advanced filtering
                     try:
-                        from services.ai_service import AIService
 
                         # Get answer from AI service Facebook query processor
                         chat_logger.info(f"Facebook Beta query from {current_user.username}: {query[:100]}")
                         answer = AIService.process_chat_query(query, mode, user_company)
 
                         # Stream answer in chunks
-                        words = answer.split()
-                        chunk_size = 10
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                        yield from _sse_stream_words(answer)
 
                         # Save to chat history
                         save_user_chat_history(current_user.id, session_id, mode, query, answer)
@@ -293,7 +504,6 @@ def chatbot_query_stream():
 
                     except Exception as e:
                         chat_logger.error(f"Facebook Beta processing error: {str(e)}")
-                        import traceback
                         traceback.print_exc()
                         yield f"data: {json.dumps({'content': f'Sorry, Facebook Beta query failed. Please try rephrasing your question.', 'done': True})}\n\n"
 
@@ -307,22 +517,20 @@ def chatbot_query_stream():
                             yield f"data: {json.dumps({'content': 'The AI system is not ready.', 'done': True})}\n\n"
                             return
 
-                        from models.chat import get_user_chat_history
-                        history = get_user_chat_history(current_user.id, mode, session_id)
-                        if len(history) == 0:
-                            history = None
+                        history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES) or None
 
-                        answer = rag.answer(query, history=history, thinking_mode=thinking_mode, source=mode)
+                        cache_key = response_cache.make_key(mode, user_company, query, history, thinking_mode)
+                        answer = response_cache.get(cache_key)
+                        if answer is None:
+                            # Identical concurrent questions share a single RAG run
+                            answer = coalesce_inflight(
+                                cache_key,
+                                lambda: rag.answer(query, history=history, thinking_mode=thinking_mode, source=mode),
+                            )
+                            response_cache.set(cache_key, answer)
                         
                         # Stream answer in chunks
-                        words = answer.split()
-                        chunk_size = 10  # Larger chunks for faster streaming
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
-                            # No delay for maximum speed
+                        yield from _sse_stream_words(answer)
                         
                         save_user_chat_history(current_user.id, session_id, mode, query, answer)
                         structured_data = extract_structured_data(answer, None, mode)
@@ -337,20 +545,18 @@ def chatbot_query_stream():
                 log_error(e, f"Streaming error")
                 yield f"data: {json.dumps({'content': 'Sorry, I encountered an error.', 'done': True})}\n\n"
         
-        return Response(generate_response(), mimetype='text/event-stream')
+        return Response(generate_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
     except Exception as e:
         log_error(e, f"Request processing error")
         def error_response():
             yield f"data: {json.dumps({'content': 'Sorry, I could not generate a response.', 'done': True})}\n\n"
-        return Response(error_response(), mimetype='text/event-stream')
+        return Response(error_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
 
 
 @log_function_call(chat_logger, log_args=False)  # Don't log full query content
 def chatbot_query_fast():
     """Super fast chatbot query with minimal processing and immediate streaming"""
-    from flask import Response
-    import json
     
     try:
         data = request.get_json(force=True) or {}
@@ -366,20 +572,23 @@ def chatbot_query_fast():
                     yield f"data: {json.dumps({'content': 'Hello! How can I help you today?', 'done': True})}\n\n"
                 else:
                     yield f"data: {json.dumps({'content': 'Please ask something about your vehicle, concerns, or the available data.', 'done': True})}\n\n"
-            return Response(empty_response(), mimetype='text/event-stream')
+            return Response(empty_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
         # Get user's company
         user_company = current_user.company_id or 'haval'
         
+        # Known failures get a plain JSON status instead of a one-frame SSE stream
+        failure = _precheck(mode, user_company)
+        if failure:
+            status_code, message = failure
+            return jsonify({"answer": message}), status_code
+        
         # Get or create session ID
-        session_id = session.get('chat_session_id')
-        if not session_id:
-            session_id = secrets.token_hex(16)
-            session['chat_session_id'] = session_id
+        session_id = _get_chat_session_id()
         
         def generate_fast_response():
             try:
-                start_time = time.time()
+                start_time = time.monotonic()
                 
                 # Handle Insights mode with streaming
                 if mode == "insights":
@@ -390,9 +599,8 @@ def chatbot_query_fast():
                         return
                     
                     try:
-                        # Minimal history for speed (only last 4 messages)
-                        from models.chat import get_user_chat_history
-                        history = get_user_chat_history(current_user.id, mode, session_id, limit=4)
+                        # Minimal history for speed (only the last 2 exchanges = 4 messages)
+                        history = get_user_chat_history_page(current_user.id, mode, session_id, limit=2)
                         
                         # Build minimal messages for speed
                         messages = [
@@ -400,7 +608,7 @@ def chatbot_query_fast():
                         ]
                         
                         if history:
-                            for msg in history[-4:]:  # Only last 4 messages for speed
+                            for msg in history:
                                 if msg.get('role') in ['user', 'assistant']:
                                     content = msg['content'].strip()
                                     if content:
@@ -419,37 +627,23 @@ def chatbot_query_fast():
                                 stream=True
                             )
                             
-                            full_answer = ""
-                            for chunk in response:
-                                if chunk.choices[0].delta.content:
-                                    content = chunk.choices[0].delta.content
-                                    full_answer += content
-                                    yield f"data: {json.dumps({'content': content, 'done': False})}\n\n"
+                            # Empty/None deltas (role and finish chunks) are dropped by _coalesce_deltas
+                            parts = []
+                            deltas = _prefetch(_openai_deltas(response))
+                            for content in _coalesce_deltas(deltas):
+                                parts.append(content)
+                                yield _sse(content)
+                            full_answer = "".join(parts)
                         else:
-                            # This is a GrokClient, use generate method and simulate streaming
-                            prompt_parts = []
-                            for msg in messages:
-                                if msg['role'] == 'system':
-                                    prompt_parts.append(f"System: {msg['content']}")
-                                elif msg['role'] == 'user':
-                                    prompt_parts.append(f"User: {msg['content']}")
-                                elif msg['role'] == 'assistant':
-                                    prompt_parts.append(f"Assistant: {msg['content']}")
-                            
-                            prompt = "\n\n".join(prompt_parts) + "\n\nAssistant:"
-                            llm_response = openai_client.generate(prompt, max_tokens=1000, temperature=0.3)
-                            full_answer = extract_text_from_llm_response(llm_response)
-                            
-                            # Simulate streaming by sending words in chunks
-                            words = full_answer.split()
-                            chunk_size = 8
-                            for i in range(0, len(words), chunk_size):
-                                chunk = " ".join(words[i:i+chunk_size])
-                                if i + chunk_size < len(words):
-                                    chunk += " "
-                                yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                            # This is a wrapped LLM client (GrokClient etc.) - stream its deltas
+                            # through the shared client so tokens reach the user as they are generated
+                            parts = []
+                            for content in _coalesce_deltas(_prefetch(openai_client.stream(messages, max_tokens=1000, temperature=0.3))):
+                                parts.append(content)
+                                yield _sse(content)
+                            full_answer = "".join(parts)
                         
-                        # Save to chat history (async to not block response)
+                        # Save to chat history before the final frame, so a quick follow-up sees it
                         try:
                             save_user_chat_history(current_user.id, session_id, mode, query, full_answer)
                         except:
@@ -472,30 +666,19 @@ def chatbot_query_fast():
                             yield f"data: {json.dumps({'content': 'The AI system is not ready yet. Please try again in a moment.', 'done': True})}\n\n"
                             return
                         
-                        # Minimal history for speed
-                        from models.chat import get_user_chat_history
-                        history = get_user_chat_history(current_user.id, mode, session_id, limit=4)
-                        if len(history) == 0:
-                            history = None
+                        # Minimal history for speed (the last 2 exchanges)
+                        history = get_user_chat_history_page(current_user.id, mode, session_id, limit=2) or None
                         
                         # Use RAG engine with speed optimizations
-                        ai_start_time = time.time()
+                        ai_start_time = time.monotonic()
                         
                         # Force non-thinking mode and minimal processing
                         answer = rag.answer(query, history=history, thinking_mode=False, source=mode)
                         
                         # Stream the answer in chunks for immediate feedback
-                        words = answer.split()
-                        chunk_size = 8  # Larger chunks for faster streaming
+                        yield from _sse_stream_words(answer, chunk_size=8)
                         
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
-                            # No delay for maximum speed
-                        
-                        # Save to chat history (async to not block response)
+                        # Save to chat history before the final frame, so a quick follow-up sees it
                         try:
                             save_user_chat_history(current_user.id, session_id, mode, query, answer)
                         except:
@@ -511,16 +694,14 @@ def chatbot_query_fast():
                 log_error(e, f"Fast streaming error for user {current_user.username}")
                 yield f"data: {json.dumps({'content': 'Sorry, I encountered an error.', 'done': True})}\n\n"
         
-        return Response(generate_fast_response(), mimetype='text/event-stream')
+        return Response(generate_fast_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
     except Exception as e:
         log_error(e, f"Fast request processing error for user {current_user.username if current_user.is_authenticated else 'Anonymous'}")
         def error_response():
             yield f"data: {json.dumps({'content': 'Sorry, I could not generate a response.', 'done': True})}\n\n"
-        return Response(error_response(), mimetype='text/event-stream')
+        return Response(error_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
     """Process chatbot queries with streaming responses for super fast experience"""
-    from flask import Response
-    import json
     
     try:
         data = request.get_json(force=True) or {}
@@ -536,20 +717,17 @@ def chatbot_query_fast():
                     yield f"data: {json.dumps({'content': 'Hello! How can I help you today?', 'done': True})}\n\n"
                 else:
                     yield f"data: {json.dumps({'content': 'Please ask something about your vehicle, concerns, or the available data.', 'done': True})}\n\n"
-            return Response(empty_response(), mimetype='text/event-stream')
+            return Response(empty_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
         # Get user's company
         user_company = current_user.company_id or 'haval'
         
         # Get or create session ID
-        session_id = session.get('chat_session_id')
-        if not session_id:
-            session_id = secrets.token_hex(16)
-            session['chat_session_id'] = session_id
+        session_id = _get_chat_session_id()
         
         def generate_response():
             try:
-                start_time = time.time()
+                start_time = time.monotonic()
                 
                 # Handle Insights mode with streaming
                 if mode == "insights":
@@ -561,8 +739,7 @@ def chatbot_query_fast():
                     
                     try:
                         # Get chat history
-                        from models.chat import get_user_chat_history
-                        history = get_user_chat_history(current_user.id, mode, session_id)
+                        history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES)
                         
                         # Build messages
                         messages = [
@@ -570,8 +747,7 @@ def chatbot_query_fast():
                         ]
                         
                         if history:
-                            recent_history = history[-20:]
-                            for msg in recent_history:
+                            for msg in history:
                                 if msg.get('role') in ['user', 'assistant']:
                                     content = msg['content'].strip()
                                     if content:
@@ -580,7 +756,7 @@ def chatbot_query_fast():
                         messages.append({"role": "user", "content": query})
                         
                         # Check if this is a GrokClient or actual OpenAI client
-                        ai_start_time = time.time()
+                        ai_start_time = time.monotonic()
                         if hasattr(openai_client, 'chat') and hasattr(openai_client.chat, 'completions'):
                             # This is an actual OpenAI client with streaming support
                             response = openai_client.chat.completions.create(
@@ -591,12 +767,13 @@ def chatbot_query_fast():
                                 stream=True  # Enable streaming
                             )
                             
-                            full_answer = ""
-                            for chunk in response:
-                                if chunk.choices[0].delta.content:
-                                    content = chunk.choices[0].delta.content
-                                    full_answer += content
-                                    yield f"data: {json.dumps({'content': content, 'done': False})}\n\n"
+                            # Empty/None deltas (role and finish chunks) are dropped by _coalesce_deltas
+                            parts = []
+                            deltas = _prefetch(_openai_deltas(response))
+                            for content in _coalesce_deltas(deltas):
+                                parts.append(content)
+                                yield _sse(content)
+                            full_answer = "".join(parts)
                         else:
                             # This is a GrokClient, use generate method and simulate streaming
                             prompt_parts = []
@@ -613,15 +790,9 @@ def chatbot_query_fast():
                             full_answer = extract_text_from_llm_response(llm_response)
                             
                             # Simulate streaming by sending words in chunks
-                            words = full_answer.split()
-                            chunk_size = 8
-                            for i in range(0, len(words), chunk_size):
-                                chunk = " ".join(words[i:i+chunk_size])
-                                if i + chunk_size < len(words):
-                                    chunk += " "
-                                yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                            yield from _sse_stream_words(full_answer, chunk_size=8)
                         
-                        ai_duration = time.time() - ai_start_time
+                        ai_duration = time.monotonic() - ai_start_time
                         
                         # Save to chat history
                         save_user_chat_history(current_user.id, session_id, mode, query, full_answer)
@@ -629,7 +800,7 @@ def chatbot_query_fast():
                         # Extract structured data
                         structured_data = extract_structured_data(full_answer, None, mode)
                         
-                        log_ai_activity("Insights Query", "OpenAI", None, ai_duration)
+                        _persist_later(log_ai_activity, "Insights Query", "OpenAI", None, ai_duration)
                         
                         yield f"data: {json.dumps({'content': '', 'done': True, 'structured': structured_data})}\n\n"
                         
@@ -640,8 +811,8 @@ def chatbot_query_fast():
                 else:
                     # RAG-based modes with optimized processing
                     try:
-                        from ai.haval_pipeline import get_pipeline_status, get_rag_engine
-                        status = get_pipeline_status()
+                        from ai.haval_pipeline import get_rag_engine
+                        status = _get_pipeline_status()
                     except Exception as e:
                         yield f"data: {json.dumps({'content': 'The AI system is not available. Please try again later.', 'done': True})}\n\n"
                         return
@@ -652,7 +823,6 @@ def chatbot_query_fast():
                         return
                     
                     # Get company config and RAG engine
-                    from config import get_company_config
                     company_config = get_company_config(user_company)
                     
                     # Validate source availability
@@ -676,43 +846,30 @@ def chatbot_query_fast():
                         return
                     
                     # Get chat history
-                    from models.chat import get_user_chat_history
-                    history = get_user_chat_history(current_user.id, mode, session_id)
-                    if len(history) == 0:
-                        history = None
+                    history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES) or None
                     
                     # Use RAG engine with streaming if available
-                    ai_start_time = time.time()
+                    ai_start_time = time.monotonic()
                     
                     # Check if RAG engine supports streaming
                     if hasattr(rag, 'answer_stream'):
                         # Stream from RAG engine
                         full_answer = ""
-                        for chunk in rag.answer_stream(query, history=history, thinking_mode=thinking_mode, source=mode):
+                        for chunk in _coalesce_deltas(_prefetch(rag.answer_stream(query, history=history, thinking_mode=thinking_mode, source=mode))):
                             full_answer += chunk
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
+                            yield _sse(chunk)
                     else:
                         # Fallback to regular answer but send immediately
                         answer = rag.answer(query, history=history, thinking_mode=thinking_mode, source=mode)
                         full_answer = answer
                         
                         # Send answer in chunks for perceived streaming
-                        words = answer.split()
-                        chunk_size = 10  # Larger chunks for faster streaming
-                        for i in range(0, len(words), chunk_size):
-                            chunk = " ".join(words[i:i+chunk_size])
-                            if i + chunk_size < len(words):
-                                chunk += " "
-                            yield f"data: {json.dumps({'content': chunk, 'done': False})}\n\n"
-                            # No delay for maximum speed
+                        yield from _sse_stream_words(answer)
                     
-                    ai_duration = time.time() - ai_start_time
+                    ai_duration = time.monotonic() - ai_start_time
                     
                     # Clean up any placeholder patterns
-                    import re
-                    full_answer = re.sub(r'CHART_PLACEHOLDER_\d+', '', full_answer)
-                    full_answer = re.sub(r'__CHART_PLACEHOLDER_\d+__', '', full_answer)
-                    full_answer = re.sub(r'\n\s*\n\s*\n', '\n\n', full_answer).strip()
+                    full_answer = _strip_chart_placeholders(full_answer)
                     
                     # Save to chat history
                     save_user_chat_history(current_user.id, session_id, mode, query, full_answer)
@@ -720,7 +877,7 @@ def chatbot_query_fast():
                     # Extract structured data
                     structured_data = extract_structured_data(full_answer, None, mode)
                     
-                    log_ai_activity(f"{mode.title()} Query", "RAG Engine", None, ai_duration)
+                    _persist_later(log_ai_activity, f"{mode.title()} Query", "RAG Engine", None, ai_duration)
                     
                     yield f"data: {json.dumps({'content': '', 'done': True, 'structured': structured_data})}\n\n"
                     
@@ -728,13 +885,13 @@ def chatbot_query_fast():
                 log_error(e, f"Streaming error for user {current_user.username}")
                 yield f"data: {json.dumps({'content': 'Sorry, I encountered an error while processing your request.', 'done': True})}\n\n"
         
-        return Response(generate_response(), mimetype='text/event-stream')
+        return Response(generate_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
         
     except Exception as e:
         log_error(e, f"Request processing error for user {current_user.username if current_user.is_authenticated else 'Anonymous'}")
         def error_response():
             yield f"data: {json.dumps({'content': 'Sorry, I could not generate a response.', 'done': True})}\n\n"
-        return Response(error_response(), mimetype='text/event-stream')
+        return Response(error_response(), mimetype='text/event-stream', headers=SSE_HEADERS)
 
 
 @log_function_call(chat_logger, log_args=False)  # Don't log full query content
@@ -761,12 +918,9 @@ def chatbot_query():
         user_company = current_user.company_id or 'haval'
         
         # Get or create session ID
-        session_id = session.get('chat_session_id')
-        if not session_id:
-            session_id = secrets.token_hex(16)
-            session['chat_session_id'] = session_id
+        session_id = _get_chat_session_id()
         
-        start_time = time.time()
+        start_time = time.monotonic()
         
         try:
             # Handle Insights mode first (doesn't need RAG engine)
@@ -783,10 +937,8 @@ def chatbot_query():
                 
                 try:
                     # Get user-specific chat history for the mode
-                    from models.chat import get_user_chat_history
-                    history = get_user_chat_history(current_user.id, mode, session_id)
-                    if len(history) == 0:
-                        history = None
+                    # Only the last 10 exchanges (20 messages) are sent, so fetch just those
+                    history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES) or None
                     
                     # Build conversation history for ChatGPT-like experience
                     messages = [
@@ -795,15 +947,10 @@ def chatbot_query():
                     
                     # Add conversation history (last 10 exchanges to stay within token limits)
                     if history:
-                        recent_history = history[-20:]  # Last 20 messages (10 exchanges)
-                        for msg in recent_history:
+                        for msg in history:
                             if msg.get('role') in ['user', 'assistant']:
                                 # Clean the content from any placeholder patterns
-                                content = msg['content']
-                                import re
-                                content = re.sub(r'CHART_PLACEHOLDER_\d+', '', content)
-                                content = re.sub(r'__CHART_PLACEHOLDER_\d+__', '', content)
-                                content = content.strip()
+                                content = _CHART_RE.sub('', msg['content']).strip()
                                 
                                 if content:  # Only add non-empty messages
                                     messages.append({
@@ -814,7 +961,7 @@ def chatbot_query():
                     # Add current user message
                     messages.append({"role": "user", "content": query})
                     
-                    ai_start_time = time.time()
+                    ai_start_time = time.monotonic()
                     
                     # Check if this is a GrokClient or actual OpenAI client
                     if hasattr(openai_client, 'chat') and hasattr(openai_client.chat, 'completions'):
@@ -834,18 +981,10 @@ def chatbot_query():
                         # Extract text from LLMResponse object
                         answer = extract_text_from_llm_response(llm_response)
                     
-                    ai_duration = time.time() - ai_start_time
+                    ai_duration = time.monotonic() - ai_start_time
                     
-                    # Aggressive cleanup of any placeholder patterns
-                    import re
-                    answer = re.sub(r'CHART_PLACEHOLDER_\d+', '', answer)
-                    answer = re.sub(r'__CHART_PLACEHOLDER_\d+__', '', answer)
-                    answer = re.sub(r'\bCHART_PLACEHOLDER_\d+\b', '', answer)
-                    answer = re.sub(r'CHART_PLACEHOLDER_\d+\s*', '', answer)
-                    answer = re.sub(r'\s*CHART_PLACEHOLDER_\d+', '', answer)
-                    answer = re.sub(r'\n\s*CHART_PLACEHOLDER_\d+\s*\n', '\n', answer)
-                    answer = re.sub(r'^CHART_PLACEHOLDER_\d+\s*\n', '', answer, flags=re.MULTILINE)
-                    answer = re.sub(r'\n\s*\n\s*\n', '\n\n', answer).strip()
+                    # Cleanup of any placeholder patterns
+                    answer = _strip_chart_placeholders(answer)
                     
                     # Save to chat history
                     save_user_chat_history(current_user.id, session_id, mode, query, answer)
@@ -853,7 +992,7 @@ def chatbot_query():
                     # Extract structured data from answer
                     structured_data = extract_structured_data(answer, None, mode)
                     
-                    log_ai_activity("Insights Query", "OpenAI", None, ai_duration)
+                    _persist_later(log_ai_activity, "Insights Query", "OpenAI", None, ai_duration)
                     chat_logger.info(f"Insights query processed for user {current_user.username}: {ai_duration:.2f}s")
                     
                     return jsonify({
@@ -873,26 +1012,23 @@ def chatbot_query():
 
                 try:
                     from ai.dealership_engine import DealershipPipeline
-                    from models.chat import get_user_chat_history
 
                     # Initialize dealership pipeline
                     dealership_pipeline = DealershipPipeline()
 
                     # Get chat history (already uses existing intent classifier for follow-ups)
-                    history = get_user_chat_history(current_user.id, mode, session_id)
-                    if len(history) == 0:
-                        history = None
+                    history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES) or None
 
                     # Get answer from dealership pipeline
-                    ai_start_time = time.time()
+                    ai_start_time = time.monotonic()
                     answer = dealership_pipeline.answer(query, chat_history=history)
-                    ai_duration = time.time() - ai_start_time
+                    ai_duration = time.monotonic() - ai_start_time
 
                     # Save to chat history
                     save_user_chat_history(current_user.id, session_id, mode, query, answer)
                     structured_data = extract_structured_data(answer, None, mode)
 
-                    log_ai_activity("Dealership Query", "Dealership Pipeline", None, ai_duration)
+                    _persist_later(log_ai_activity, "Dealership Query", "Dealership Pipeline", None, ai_duration)
                     chat_logger.info(f"Dealership query processed for user {current_user.username}: {ai_duration:.2f}s")
 
                     return jsonify({
@@ -902,7 +1038,6 @@ def chatbot_query():
 
                 except Exception as e:
                     log_error(e, f"Dealership pipeline error for user {current_user.username}")
-                    import traceback
                     traceback.print_exc()
                     return jsonify({
                         "answer": "Sorry, dealership query failed. Please try rephrasing your question."
@@ -913,18 +1048,17 @@ def chatbot_query():
                 chat_logger.info(f"Processing Facebook Beta query for user {current_user.username}")
 
                 try:
-                    from services.ai_service import AIService
 
                     # Get answer from AI service Facebook query processor
-                    ai_start_time = time.time()
+                    ai_start_time = time.monotonic()
                     answer = AIService.process_chat_query(query, mode, user_company)
-                    ai_duration = time.time() - ai_start_time
+                    ai_duration = time.monotonic() - ai_start_time
 
                     # Save to chat history
                     save_user_chat_history(current_user.id, session_id, mode, query, answer)
                     structured_data = extract_structured_data(answer, None, mode)
 
-                    log_ai_activity("Facebook_Beta Query", "AI Service", None, ai_duration)
+                    _persist_later(log_ai_activity, "Facebook_Beta Query", "AI Service", None, ai_duration)
                     chat_logger.info(f"Facebook Beta query processed for user {current_user.username}: {ai_duration:.2f}s")
 
                     return jsonify({
@@ -934,7 +1068,6 @@ def chatbot_query():
 
                 except Exception as e:
                     log_error(e, f"Facebook Beta processing error for user {current_user.username}")
-                    import traceback
                     traceback.print_exc()
                     return jsonify({
                         "answer": "Sorry, Facebook Beta query failed. Please try rephrasing your question."
@@ -942,8 +1075,7 @@ def chatbot_query():
 
             # For RAG-based modes (PakWheels and WhatsApp), check pipeline status
             try:
-                from ai.haval_pipeline import get_pipeline_status
-                status = get_pipeline_status()
+                status = _get_pipeline_status()
             except Exception as e:
                 chat_logger.error(f"Error getting pipeline status: {e}")
                 status = {"status": "error", "error": str(e)}
@@ -951,8 +1083,6 @@ def chatbot_query():
             if status.get("status") != "ready":
                 # Try AI analysis as fallback for non-ready pipeline
                 try:
-                    from controllers.ai_analysis import ai_analyze_query
-                    from models import get_db_connection
                     
                     conn = get_db_connection()
                     cur = conn.cursor()
@@ -964,7 +1094,7 @@ def chatbot_query():
                     # Save to chat history
                     save_user_chat_history(current_user.id, session_id, mode, query, answer)
                     
-                    processing_time = time.time() - start_time
+                    processing_time = time.monotonic() - start_time
                     chat_logger.info(f"AI Analysis fallback used for user {current_user.username}: {processing_time:.2f}s")
                     
                     return jsonify({
@@ -1005,13 +1135,9 @@ def chatbot_query():
                 })
             
             # Get user-specific chat history for the mode
-            from models.chat import get_user_chat_history
-            history = get_user_chat_history(current_user.id, mode, session_id)
-            if len(history) == 0:
-                history = None
+            history = get_user_chat_history_page(current_user.id, mode, session_id, limit=CHAT_HISTORY_EXCHANGES) or None
             
             # Get company-specific RAG engine
-            from config import get_company_config
             company_config = get_company_config(user_company)
             
             # Log which company is being queried
@@ -1044,21 +1170,18 @@ def chatbot_query():
                 })
             
             # Pass thinking_mode and source to RAG engine for filtering and formatting
-            ai_start_time = time.time()
-            answer = rag.answer(query, history=history, thinking_mode=thinking_mode, source=mode)
-            ai_duration = time.time() - ai_start_time
+            ai_start_time = time.monotonic()
+            # Identical concurrent questions share a single RAG run
+            inflight_key = get_response_cache().make_key(mode, user_company, query, history, thinking_mode)
+            answer = coalesce_inflight(
+                inflight_key,
+                lambda: rag.answer(query, history=history, thinking_mode=thinking_mode, source=mode),
+            )
+            ai_duration = time.monotonic() - ai_start_time
             
-            # Aggressive cleanup of any CHART_PLACEHOLDER patterns that LLM might output
-            import re
-            answer = re.sub(r'CHART_PLACEHOLDER_\d+', '', answer)
-            answer = re.sub(r'__CHART_PLACEHOLDER_\d+__', '', answer)
-            answer = re.sub(r'\bCHART_PLACEHOLDER_\d+\b', '', answer)
-            answer = re.sub(r'CHART_PLACEHOLDER_\d+\s*', '', answer)
-            answer = re.sub(r'\s*CHART_PLACEHOLDER_\d+', '', answer)
-            answer = re.sub(r'\n\s*CHART_PLACEHOLDER_\d+\s*\n', '\n', answer)
-            answer = re.sub(r'^CHART_PLACEHOLDER_\d+\s*\n', '', answer, flags=re.MULTILINE)
-            # Remove any leftover empty lines or extra whitespace from cleanup
-            answer = re.sub(r'\n\s*\n\s*\n', '\n\n', answer).strip()
+            # Cleanup of any CHART_PLACEHOLDER patterns that LLM might output,
+            # plus leftover empty lines or extra whitespace
+            answer = _strip_chart_placeholders(answer)
             
             # Save to chat history
             save_user_chat_history(current_user.id, session_id, mode, query, answer)
@@ -1066,8 +1189,8 @@ def chatbot_query():
             # Extract structured data from RAG answer
             structured_data = extract_structured_data(answer, None, mode)
             
-            processing_time = time.time() - start_time
-            log_ai_activity(f"{mode.title()} Query", "RAG Engine", None, ai_duration)
+            processing_time = time.monotonic() - start_time
+            _persist_later(log_ai_activity, f"{mode.title()} Query", "RAG Engine", None, ai_duration)
             chat_logger.info(f"{mode.title()} query processed for user {current_user.username}: {processing_time:.2f}s total")
             
             return jsonify({
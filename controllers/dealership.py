@@ -3,90 +3,339 @@ Dealership Management Controller
 Handles all dealership-related routes and business logic
 """
 
-from flask import render_template, request, jsonify, flash, redirect, url_for
+from flask import Response, make_response, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
 from models.dealership import (
-    DealershipDatabase, WarrantyClaim, CampaignService, 
+    get_dealership_db, WarrantyClaim, CampaignService, 
     InspectionService, RepairOrder
 )
 from utils.logger import dealership_logger, log_function_call
+from utils.cache import ttl_cache
+from utils.json_response import ojsonify
 from datetime import datetime, timedelta
 import json
 import csv
 import io
+import re
 import sqlite3
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
+from urllib.parse import urlencode
+
+# Filters are normalised before they reach SQL; values that can't match are dropped
+_VIN_RE = re.compile(r'^[A-HJ-NPR-Z0-9]{1,17}$')
+
+
+def _vin_arg(name: str = 'vin') -> str:
+    """Upper-cased VIN filter from the query string, or '' (with a flash message) if it can't be a VIN"""
+    vin = request.args.get(name, '').strip().upper()
+    if vin and not _VIN_RE.match(vin):
+        flash(f'Ignoring invalid VIN "{vin}"', 'error')
+        return ''
+    return vin
+
+
+def _date_arg(name: str) -> str:
+    """YYYY-MM-DD date filter from the query string, or '' if missing/unparseable"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return ''
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return ''
+
+
+# Listing pages are served LIMIT/OFFSET paginated
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+
+def _get_page_args() -> Tuple[int, int]:
+    """Parse ?page= and ?per_page= (clamped to MAX_PER_PAGE)"""
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    try:
+        per_page = min(max(int(request.args.get('per_page', DEFAULT_PER_PAGE)), 1), MAX_PER_PAGE)
+    except ValueError:
+        per_page = DEFAULT_PER_PAGE
+    return page, per_page
+
+
+def _paginate(rows: List[Dict[str, Any]], page: int, per_page: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Split a page of rows fetched with LIMIT per_page + 1 into the rows to show and
+    the template's pagination info (the extra row only signals a next page).
+    """
+    has_next = len(rows) > per_page
+    args = request.args.to_dict()
+    
+    def page_url(number):
+        args['page'] = number
+        return f"{request.path}?{urlencode(args)}"
+    
+    pagination = {
+        'page': page,
+        'per_page': per_page,
+        'prev_url': page_url(page - 1) if page > 1 else None,
+        'next_url': page_url(page + 1) if has_next else None,
+    }
+    return rows[:per_page], pagination
+
+
+# Users page through listings sequentially, so the next page is fetched in the
+# background while the current one renders and kept for PAGE_PREFETCH_STALE seconds
+PAGE_PREFETCH_STALE = 30
+MAX_PREFETCHED_PAGES = 256
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="page-prefetch")
+_prefetched_pages: Dict[tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+_prefetched_lock = threading.Lock()
+
+
+def _active_filters(*filters: Tuple[str, Any]) -> Tuple[Tuple[str, ...], List[Any]]:
+    """Split (condition, value) pairs into the conditions of the filters that are set and their params"""
+    active = [(condition, value) for condition, value in filters if value]
+    return tuple(condition for condition, _ in active), [value for _, value in active]
+
+
+# Columns each listing template actually renders (keep in sync with templates/dealership/*.html)
+LISTING_COLUMNS = {
+    'warranty_claims': "id, vin_number, dealership_name, car_model, claim_type, claim_date, status, cost",
+    'ffs_inspections': "id, vin_number, dealership_name, car_model, variant, inspection_date, "
+                       "odometer_reading, findings, status",
+    'sfs_inspections': "id, vin_number, dealership_name, car_model, variant, inspection_date, "
+                       "odometer_reading, findings, recommendations, status",
+    'repair_orders': "id, ro_number, vin_number, dealership_name, customer_name, customer_phone, "
+                     "issue_description, ro_date, status, total_cost, warranty_applicable",
+}
+
+
+@lru_cache(maxsize=32)
+def _build_listing_query(table: str, date_column: str, conditions: Tuple[str, ...]) -> str:
+    """
+    Paged listing SQL for one combination of active filters. Memoized so the same
+    string is reused across requests and hits sqlite3's per-connection statement cache.
+    """
+    where = " AND ".join(conditions) if conditions else "1=1"
+    return f"SELECT {LISTING_COLUMNS[table]} FROM {table} WHERE {where} ORDER BY {date_column} DESC LIMIT ? OFFSET ?"
+
+
+def _query_page(cursor, query: str, params: List[Any], page: int, per_page: int) -> List[Dict[str, Any]]:
+    """Run a _build_listing_query() query for one page, plus one extra row for _paginate"""
+    cursor.execute(query, [*params, per_page + 1, (page - 1) * per_page])
+    return rows_to_dicts(cursor)
+
+
+def _prefetch_page(key: tuple, query: str, params: List[Any], page: int, per_page: int):
+    """Background job: load a page into the prefetch cache"""
+    try:
+        with get_dealership_db().connection() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = _query_page(conn.cursor(), query, params, page, per_page)
+    except Exception as e:
+        dealership_logger.warning(f"Prefetching page {page} failed: {str(e)}")
+        return
+    
+    with _prefetched_lock:
+        if len(_prefetched_pages) >= MAX_PREFETCHED_PAGES:
+            _prefetched_pages.pop(next(iter(_prefetched_pages)))
+        _prefetched_pages[key] = (time.monotonic(), rows)
+
+
+def _fetch_listing_page(cursor, query: str, params: List[Any], page: int, per_page: int):
+    """
+    Return (rows, pagination) for one page of a listing query, served from the
+    prefetch cache when available, and queue the next page in the background.
+    """
+    base_key = (current_user.get_id(), request.endpoint, query, tuple(params), per_page)
+    with _prefetched_lock:
+        cached = _prefetched_pages.pop(base_key + (page,), None)
+    
+    if cached and time.monotonic() - cached[0] < PAGE_PREFETCH_STALE:
+        rows = cached[1]
+    else:
+        rows = _query_page(cursor, query, params, page, per_page)
+    
+    rows, pagination = _paginate(rows, page, per_page)
+    if pagination['next_url']:
+        _prefetch_executor.submit(_prefetch_page, base_key + (page + 1,), query, params, page + 1, per_page)
+    return rows, pagination
+
+
+def rows_to_dicts(cursor, chunk: int = 500) -> List[Dict[str, Any]]:
+    """Convert an executed sqlite3.Row cursor into dicts, pulling `chunk` rows at a time"""
+    cursor.arraysize = chunk
+    rows = []
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            return rows
+        rows.extend(dict(row) for row in batch)
+
+
+def _json_rows(value, sort_key=None) -> List[Dict[str, Any]]:
+    """Decode a json_group_array() column into a list of dicts, re-sorted descending by `sort_key`"""
+    rows = json.loads(value) if value else []
+    if sort_key:
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+    return rows
+
+
+# Dashboard aggregates scan whole tables; a background thread recomputes them every
+# DASHBOARD_REFRESH_SECONDS into DASHBOARD_STATS so requests only read memory
+DASHBOARD_REFRESH_SECONDS = 30
+DASHBOARD_STATS: Dict[str, Any] = {}
+_dashboard_refresher = None
+_dashboard_refresher_lock = threading.Lock()
+
+
+def _compute_dashboard_stats() -> Dict[str, Any]:
+    """Summary counts, recent claims and top dealerships for the dashboard"""
+    db = get_dealership_db()
+    
+    with db.connection() as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        # Get total warranty claims
+        cursor.execute("SELECT COUNT(*) FROM warranty_claims")
+        total_warranty_claims = cursor.fetchone()[0]
+        
+        # Get total active campaigns
+        cursor.execute("SELECT COUNT(DISTINCT campaign_id) FROM campaign_services")
+        total_campaigns = cursor.fetchone()[0]
+        
+        # Get total PDI inspections
+        cursor.execute("SELECT COUNT(*) FROM pdi_inspections")
+        total_pdis = cursor.fetchone()[0]
+        
+        # Get total repair orders
+        cursor.execute("SELECT COUNT(*) FROM repair_orders")
+        total_ros = cursor.fetchone()[0]
+        
+        # Get recent warranty claims for activity feed
+        cursor.execute("""
+            SELECT vin_number, dealership_name, problem_description, claim_date
+            FROM warranty_claims 
+            ORDER BY claim_date DESC 
+            LIMIT 5
+        """)
+        recent_claims = rows_to_dicts(cursor)
+        
+        # Get top dealerships by activity (trigger-maintained counts)
+        cursor.execute("""
+            SELECT dealership_name, activity_count
+            FROM mv_dealership_activity
+            WHERE activity_count > 0
+            ORDER BY activity_count DESC
+            LIMIT 5
+        """)
+        top_dealerships = rows_to_dicts(cursor)
+    
+    return {
+        'total_warranty_claims': total_warranty_claims,
+        'total_campaigns': total_campaigns,
+        'total_pdis': total_pdis,
+        'total_ros': total_ros,
+        'recent_claims': recent_claims,
+        'top_dealerships': top_dealerships,
+        'last_updated': datetime.now()
+    }
+
+
+def _dashboard_refresh_loop():
+    global DASHBOARD_STATS
+    while True:
+        time.sleep(DASHBOARD_REFRESH_SECONDS)
+        try:
+            # Swap in a new dict; readers never see a half-built one
+            DASHBOARD_STATS = _compute_dashboard_stats()
+        except Exception as e:
+            dealership_logger.error(f"Error refreshing dashboard stats: {str(e)}")
+
+
+def _get_dashboard_stats() -> Dict[str, Any]:
+    """Latest dashboard stats; the first call computes them inline and starts the refresher"""
+    global DASHBOARD_STATS, _dashboard_refresher
+    if _dashboard_refresher is None:
+        with _dashboard_refresher_lock:
+            if _dashboard_refresher is None:
+                DASHBOARD_STATS = _compute_dashboard_stats()
+                _dashboard_refresher = threading.Thread(target=_dashboard_refresh_loop, daemon=True, name="dashboard-refresh")
+                _dashboard_refresher.start()
+    return DASHBOARD_STATS.copy()
+
+
+# Reference data for filters/sidebars changes rarely; cache it for a few minutes
+AVAILABLE_CAMPAIGNS_TTL = 300
+TOP_COMPLAINED_VINS_TTL = 120
+
+
+@ttl_cache(AVAILABLE_CAMPAIGNS_TTL)
+def _get_available_campaigns() -> List[Dict[str, Any]]:
+    """Distinct campaigns for the campaign filter dropdown"""
+    db = get_dealership_db()
+    with db.connection() as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT campaign_id, campaign_name FROM campaigns ORDER BY campaign_name")
+        return rows_to_dicts(cursor)
+
+
+@ttl_cache(TOP_COMPLAINED_VINS_TTL)
+def _get_top_complained_vins(limit: int = 10) -> List[Dict]:
+    """Most complained VINs for the warranty claims sidebar"""
+    return WarrantyClaim.get_most_complained_vins(limit)
+
+
+# Dashboard and stats API responses may be reused by the browser for this long
+RESPONSE_MAX_AGE = 60
+
+
+def _cacheable(body) -> Response:
+    """Mark a successful response as privately cacheable with an ETag; answers 304 when If-None-Match matches"""
+    response = make_response(body)
+    response.cache_control.private = True
+    response.cache_control.max_age = RESPONSE_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+# Per-dealership API stats: the two independent queries run side by side
+DEALERSHIP_STATS_TTL = 60
+_stats_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dealership-stats")
+
+
+@ttl_cache(DEALERSHIP_STATS_TTL)
+def _get_dealership_stats(dealership_name: str = None) -> Tuple[List[Dict], Dict]:
+    """Warranty complaints and repair order statistics for one dealership (or all)"""
+    warranty_future = _stats_executor.submit(WarrantyClaim.get_dealership_complaints, dealership_name)
+    ro_future = _stats_executor.submit(RepairOrder.get_ro_statistics, dealership_name)
+    return warranty_future.result(), ro_future.result()
+
 
 @log_function_call(dealership_logger)
 def dealership_dashboard():
     """Main dealership dashboard"""
     try:
-        # Get summary statistics from database
-        db = DealershipDatabase()
+        # Get summary statistics (refreshed every DASHBOARD_REFRESH_SECONDS in the background)
+        summary_stats = _get_dashboard_stats()
         
-        with sqlite3.connect(db.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Get total warranty claims
-            cursor.execute("SELECT COUNT(*) FROM warranty_claims")
-            total_warranty_claims = cursor.fetchone()[0]
-            
-            # Get total active campaigns
-            cursor.execute("SELECT COUNT(DISTINCT campaign_id) FROM campaign_services")
-            total_campaigns = cursor.fetchone()[0]
-            
-            # Get total PDI inspections
-            cursor.execute("SELECT COUNT(*) FROM pdi_inspections")
-            total_pdis = cursor.fetchone()[0]
-            
-            # Get total repair orders
-            cursor.execute("SELECT COUNT(*) FROM repair_orders")
-            total_ros = cursor.fetchone()[0]
-            
-            # Get recent warranty claims for activity feed
-            cursor.execute("""
-                SELECT vin_number, dealership_name, problem_description, claim_date
-                FROM warranty_claims 
-                ORDER BY claim_date DESC 
-                LIMIT 5
-            """)
-            recent_claims = [dict(zip(['vin_number', 'dealership_name', 'problem_description', 'claim_date'], row)) 
-                           for row in cursor.fetchall()]
-            
-            # Get top dealerships by activity
-            cursor.execute("""
-                SELECT dealership_name, COUNT(*) as activity_count
-                FROM (
-                    SELECT dealership_name FROM warranty_claims
-                    UNION ALL
-                    SELECT dealership_name FROM pdi_inspections
-                    UNION ALL
-                    SELECT dealership_name FROM repair_orders
-                ) combined
-                GROUP BY dealership_name
-                ORDER BY activity_count DESC
-                LIMIT 5
-            """)
-            top_dealerships = [dict(zip(['dealership_name', 'activity_count'], row)) 
-                             for row in cursor.fetchall()]
+        dealership_logger.info("User %s accessed dealership dashboard", current_user.username)
+        dealership_logger.debug("Dashboard stats: Warranty Claims: %s, Campaigns: %s, PDIs: %s, ROs: %s",
+                                summary_stats['total_warranty_claims'], summary_stats['total_campaigns'],
+                                summary_stats['total_pdis'], summary_stats['total_ros'])
         
-        summary_stats = {
-            'total_warranty_claims': total_warranty_claims,
-            'total_campaigns': total_campaigns,
-            'total_pdis': total_pdis,
-            'total_ros': total_ros,
-            'recent_claims': recent_claims,
-            'top_dealerships': top_dealerships
-        }
-        
-        dealership_logger.info(f"User {current_user.username} accessed dealership dashboard")
-        dealership_logger.info(f"Dashboard stats: Warranty Claims: {total_warranty_claims}, Campaigns: {total_campaigns}, PDIs: {total_pdis}, ROs: {total_ros}")
-        
-        return render_template(
+        return _cacheable(render_template(
             'dealership/dashboard.html',
             stats=summary_stats,
             user=current_user
-        )
+        ))
         
     except Exception as e:
         dealership_logger.error(f"Error loading dealership dashboard: {str(e)}")
@@ -98,63 +347,46 @@ def warranty_claims():
     """Warranty claims management page"""
     try:
         # Get filter parameters
-        vin_filter = request.args.get('vin', '')
+        vin_filter = _vin_arg()
         dealership_filter = request.args.get('dealership', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
+        date_from = _date_arg('date_from')
+        date_to = _date_arg('date_to')
         claim_type = request.args.get('claim_type', '')
         
+        page, per_page = _get_page_args()
+        
         # Get warranty claims data
         claims_data = []
+        pagination = None
         
         if vin_filter:
             claims_data = WarrantyClaim.get_claims_by_vin(vin_filter)
         else:
             # Get all warranty claims with filters
-            db = DealershipDatabase()
-            with sqlite3.connect(db.db_path) as conn:
+            db = get_dealership_db()
+            with db.connection() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                query = """
-                    SELECT * FROM warranty_claims 
-                    WHERE 1=1
-                """
-                params = []
-                
-                if dealership_filter:
-                    query += " AND dealership_name = ?"
-                    params.append(dealership_filter)
-                
-                if date_from:
-                    query += " AND claim_date >= ?"
-                    params.append(date_from)
-                    
-                if date_to:
-                    query += " AND claim_date <= ?"
-                    params.append(date_to)
-                
-                if claim_type:
-                    query += " AND claim_type = ?"
-                    params.append(claim_type)
-                
-                query += " ORDER BY claim_date DESC"
-                
-                cursor.execute(query, params)
-                claims_data = [dict(row) for row in cursor.fetchall()]
+                conditions, params = _active_filters(
+                    ("dealership_name = ?", dealership_filter),
+                    ("claim_date >= ?", date_from),
+                    ("claim_date <= ?", date_to),
+                    ("claim_type = ?", claim_type),
+                )
+                query = _build_listing_query('warranty_claims', 'claim_date', conditions)
+                claims_data, pagination = _fetch_listing_page(cursor, query, params, page, per_page)
         
-        # Debug logging
-        dealership_logger.info(f"Found {len(claims_data)} warranty claims")
-        if claims_data:
-            dealership_logger.info(f"Sample claim data: {claims_data[0]}")
+        dealership_logger.debug("Found %d warranty claims", len(claims_data))
         
         # Get most complained VINs
-        top_complained_vins = WarrantyClaim.get_most_complained_vins(10)
-        dealership_logger.info(f"Found {len(top_complained_vins)} top complained VINs")
+        top_complained_vins = _get_top_complained_vins(10)
+        dealership_logger.debug("Found %d top complained VINs", len(top_complained_vins))
         
         return render_template(
             'dealership/warranty_claims.html',
             claims=claims_data,
+            pagination=pagination,
             top_vins=top_complained_vins,
             filters={
                 'vin': vin_filter,
@@ -180,8 +412,8 @@ def campaign_reports():
         dealership_filter = request.args.get('dealership', '')
         
         # Get campaign statistics
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -209,7 +441,7 @@ def campaign_reports():
             query += " GROUP BY c.campaign_id ORDER BY c.start_date DESC"
             
             cursor.execute(query, params)
-            campaign_stats = [dict(row) for row in cursor.fetchall()]
+            campaign_stats = rows_to_dicts(cursor)
             
             # Get campaign services details
             services_query = """
@@ -231,13 +463,12 @@ def campaign_reports():
             services_query += " ORDER BY cs.service_date DESC LIMIT 100"
             
             cursor.execute(services_query, services_params)
-            campaign_services = [dict(row) for row in cursor.fetchall()]
-            
-            # Get available campaigns for filter
-            cursor.execute("SELECT DISTINCT campaign_id, campaign_name FROM campaigns ORDER BY campaign_name")
-            available_campaigns = [dict(row) for row in cursor.fetchall()]
+            campaign_services = rows_to_dicts(cursor)
         
-        dealership_logger.info(f"Found {len(campaign_stats)} campaigns and {len(campaign_services)} services")
+        # Get available campaigns for filter
+        available_campaigns = _get_available_campaigns()
+        
+        dealership_logger.debug("Found %d campaigns and %d services", len(campaign_stats), len(campaign_services))
         
         return render_template(
             'dealership/campaign_reports.html',
@@ -261,63 +492,43 @@ def ffs_inspections():
     """FFS inspections management page"""
     try:
         # Get filter parameters
-        vin_filter = request.args.get('vin', '')
+        vin_filter = _vin_arg()
         dealership_filter = request.args.get('dealership', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
+        date_from = _date_arg('date_from')
+        date_to = _date_arg('date_to')
+        page, per_page = _get_page_args()
         
         # Get FFS inspection data
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            query = """
-                SELECT * FROM ffs_inspections 
-                WHERE 1=1
-            """
-            params = []
-            
-            if vin_filter:
-                query += " AND vin_number = ?"
-                params.append(vin_filter)
-                
-            if dealership_filter:
-                query += " AND dealership_name = ?"
-                params.append(dealership_filter)
-            
-            if date_from:
-                query += " AND inspection_date >= ?"
-                params.append(date_from)
-                
-            if date_to:
-                query += " AND inspection_date <= ?"
-                params.append(date_to)
-            
-            query += " ORDER BY inspection_date DESC"
-            
-            cursor.execute(query, params)
-            inspections = [dict(row) for row in cursor.fetchall()]
-            
-            # Get summary statistics
-            cursor.execute("SELECT COUNT(*) as total FROM ffs_inspections")
-            total_inspections = cursor.fetchone()['total']
-            
-            cursor.execute("""
-                SELECT dealership_name, COUNT(*) as count 
-                FROM ffs_inspections 
-                GROUP BY dealership_name 
-                ORDER BY count DESC 
-                LIMIT 5
-            """)
-            top_dealerships = [dict(row) for row in cursor.fetchall()]
+            conditions, params = _active_filters(
+                ("vin_number = ?", vin_filter),
+                ("dealership_name = ?", dealership_filter),
+                ("inspection_date >= ?", date_from),
+                ("inspection_date <= ?", date_to),
+            )
+            query = _build_listing_query('ffs_inspections', 'inspection_date', conditions)
+            inspections, pagination = _fetch_listing_page(cursor, query, params, page, per_page)
             
+            # Get summary statistics in one round-trip
             cursor.execute("""
-                SELECT AVG(cost) as avg_cost 
-                FROM ffs_inspections 
-                WHERE cost > 0
+                SELECT COUNT(*) as total,
+                       AVG(CASE WHEN cost > 0 THEN cost END) as avg_cost,
+                       (SELECT json_group_array(json_object('dealership_name', dealership_name, 'count', count))
+                        FROM (SELECT dealership_name, COUNT(*) as count 
+                              FROM ffs_inspections 
+                              GROUP BY dealership_name 
+                              ORDER BY count DESC 
+                              LIMIT 5)) as top_dealerships
+                FROM ffs_inspections
             """)
-            avg_cost = cursor.fetchone()['avg_cost'] or 0
+            summary = cursor.fetchone()
+            total_inspections = summary['total']
+            avg_cost = summary['avg_cost'] or 0
+            top_dealerships = _json_rows(summary['top_dealerships'], sort_key='count')
         
         summary_stats = {
             'total_inspections': total_inspections,
@@ -325,11 +536,12 @@ def ffs_inspections():
             'top_dealerships': top_dealerships
         }
         
-        dealership_logger.info(f"Found {len(inspections)} FFS inspections")
+        dealership_logger.debug("Found %d FFS inspections", len(inspections))
         
         return render_template(
             'dealership/ffs_inspections.html',
             inspections=inspections,
+            pagination=pagination,
             stats=summary_stats,
             filters={
                 'vin': vin_filter,
@@ -350,70 +562,45 @@ def sfs_inspections():
     """SFS inspections management page"""
     try:
         # Get filter parameters
-        vin_filter = request.args.get('vin', '')
+        vin_filter = _vin_arg()
         dealership_filter = request.args.get('dealership', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
+        date_from = _date_arg('date_from')
+        date_to = _date_arg('date_to')
+        page, per_page = _get_page_args()
         
         # Get SFS inspection data
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            query = """
-                SELECT * FROM sfs_inspections 
-                WHERE 1=1
-            """
-            params = []
-            
-            if vin_filter:
-                query += " AND vin_number = ?"
-                params.append(vin_filter)
-                
-            if dealership_filter:
-                query += " AND dealership_name = ?"
-                params.append(dealership_filter)
-            
-            if date_from:
-                query += " AND inspection_date >= ?"
-                params.append(date_from)
-                
-            if date_to:
-                query += " AND inspection_date <= ?"
-                params.append(date_to)
-            
-            query += " ORDER BY inspection_date DESC"
-            
-            cursor.execute(query, params)
-            inspections = [dict(row) for row in cursor.fetchall()]
-            
-            # Get summary statistics
-            cursor.execute("SELECT COUNT(*) as total FROM sfs_inspections")
-            total_inspections = cursor.fetchone()['total']
-            
-            cursor.execute("""
-                SELECT dealership_name, COUNT(*) as count 
-                FROM sfs_inspections 
-                GROUP BY dealership_name 
-                ORDER BY count DESC 
-                LIMIT 5
-            """)
-            top_dealerships = [dict(row) for row in cursor.fetchall()]
-            
-            cursor.execute("""
-                SELECT AVG(cost) as avg_cost 
-                FROM sfs_inspections 
-                WHERE cost > 0
-            """)
-            avg_cost = cursor.fetchone()['avg_cost'] or 0
+            conditions, params = _active_filters(
+                ("vin_number = ?", vin_filter),
+                ("dealership_name = ?", dealership_filter),
+                ("inspection_date >= ?", date_from),
+                ("inspection_date <= ?", date_to),
+            )
+            query = _build_listing_query('sfs_inspections', 'inspection_date', conditions)
+            inspections, pagination = _fetch_listing_page(cursor, query, params, page, per_page)
             
+            # Get summary statistics in one round-trip
             cursor.execute("""
-                SELECT AVG(odometer_reading) as avg_mileage 
-                FROM sfs_inspections 
-                WHERE odometer_reading > 0
+                SELECT COUNT(*) as total,
+                       AVG(CASE WHEN cost > 0 THEN cost END) as avg_cost,
+                       AVG(CASE WHEN odometer_reading > 0 THEN odometer_reading END) as avg_mileage,
+                       (SELECT json_group_array(json_object('dealership_name', dealership_name, 'count', count))
+                        FROM (SELECT dealership_name, COUNT(*) as count 
+                              FROM sfs_inspections 
+                              GROUP BY dealership_name 
+                              ORDER BY count DESC 
+                              LIMIT 5)) as top_dealerships
+                FROM sfs_inspections
             """)
-            avg_mileage = cursor.fetchone()['avg_mileage'] or 0
+            summary = cursor.fetchone()
+            total_inspections = summary['total']
+            avg_cost = summary['avg_cost'] or 0
+            avg_mileage = summary['avg_mileage'] or 0
+            top_dealerships = _json_rows(summary['top_dealerships'], sort_key='count')
         
         summary_stats = {
             'total_inspections': total_inspections,
@@ -422,11 +609,12 @@ def sfs_inspections():
             'top_dealerships': top_dealerships
         }
         
-        dealership_logger.info(f"Found {len(inspections)} SFS inspections")
+        dealership_logger.debug("Found %d SFS inspections", len(inspections))
         
         return render_template(
             'dealership/sfs_inspections.html',
             inspections=inspections,
+            pagination=pagination,
             stats=summary_stats,
             filters={
                 'vin': vin_filter,
@@ -448,8 +636,8 @@ def pdi_inspections():
     try:
         # Get filter parameters
         dealership_filter = request.args.get('dealership', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
+        date_from = _date_arg('date_from')
+        date_to = _date_arg('date_to')
         
         # Get PDI statistics
         pdi_stats = InspectionService.get_pdi_statistics(
@@ -479,88 +667,62 @@ def repair_orders():
     """Repair orders management page"""
     try:
         # Get filter parameters
-        vin_filter = request.args.get('vin', '')
+        vin_filter = _vin_arg()
         ro_filter = request.args.get('ro_number', '')
         dealership_filter = request.args.get('dealership', '')
         status_filter = request.args.get('status', '')
-        date_from = request.args.get('date_from', '')
-        date_to = request.args.get('date_to', '')
+        date_from = _date_arg('date_from')
+        date_to = _date_arg('date_to')
+        page, per_page = _get_page_args()
         
         # Get repair order data
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            query = """
-                SELECT * FROM repair_orders 
-                WHERE 1=1
-            """
-            params = []
-            
-            if vin_filter:
-                query += " AND vin_number = ?"
-                params.append(vin_filter)
-                
-            if ro_filter:
-                query += " AND ro_number LIKE ?"
-                params.append(f"%{ro_filter}%")
-                
-            if dealership_filter:
-                query += " AND dealership_name = ?"
-                params.append(dealership_filter)
-                
-            if status_filter:
-                query += " AND status = ?"
-                params.append(status_filter)
-            
-            if date_from:
-                query += " AND ro_date >= ?"
-                params.append(date_from)
-                
-            if date_to:
-                query += " AND ro_date <= ?"
-                params.append(date_to)
-            
-            query += " ORDER BY ro_date DESC"
-            
-            cursor.execute(query, params)
-            repair_orders = [dict(row) for row in cursor.fetchall()]
-            
-            # Get summary statistics
-            cursor.execute("SELECT COUNT(*) as total FROM repair_orders")
-            total_ros = cursor.fetchone()['total']
-            
-            cursor.execute("""
-                SELECT COUNT(*) as warranty_count 
-                FROM repair_orders 
-                WHERE warranty_applicable = 1
-            """)
-            warranty_ros = cursor.fetchone()['warranty_count']
-            
-            cursor.execute("""
-                SELECT AVG(total_cost) as avg_cost 
-                FROM repair_orders 
-                WHERE total_cost > 0
-            """)
-            avg_cost = cursor.fetchone()['avg_cost'] or 0
-            
-            cursor.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM repair_orders 
-                GROUP BY status 
-                ORDER BY count DESC
-            """)
-            status_breakdown = [dict(row) for row in cursor.fetchall()]
+            # Trigram FTS needs at least 3 characters; shorter searches use LIKE
+            if db.ro_number_fts and len(ro_filter) >= 3:
+                ro_condition = ("id IN (SELECT rowid FROM repair_orders_fts WHERE repair_orders_fts MATCH ?)",
+                                '"' + ro_filter.replace('"', '""') + '"')
+            else:
+                ro_condition = ("ro_number LIKE ?", f"%{ro_filter}%" if ro_filter else None)
+            
+            conditions, params = _active_filters(
+                ("vin_number = ?", vin_filter),
+                ro_condition,
+                ("dealership_name = ?", dealership_filter),
+                ("status = ?", status_filter),
+                ("ro_date >= ?", date_from),
+                ("ro_date <= ?", date_to),
+            )
+            query = _build_listing_query('repair_orders', 'ro_date', conditions)
+            repair_orders, pagination = _fetch_listing_page(cursor, query, params, page, per_page)
             
+            # Get summary statistics in one round-trip
             cursor.execute("""
-                SELECT dealership_name, COUNT(*) as count, AVG(total_cost) as avg_cost
-                FROM repair_orders 
-                GROUP BY dealership_name 
-                ORDER BY count DESC 
-                LIMIT 5
+                SELECT COUNT(*) as total,
+                       COUNT(CASE WHEN warranty_applicable = 1 THEN 1 END) as warranty_count,
+                       AVG(CASE WHEN total_cost > 0 THEN total_cost END) as avg_cost,
+                       (SELECT json_group_array(json_object('status', status, 'count', count))
+                        FROM (SELECT status, COUNT(*) as count 
+                              FROM repair_orders 
+                              GROUP BY status 
+                              ORDER BY count DESC)) as status_breakdown,
+                       (SELECT json_group_array(json_object('dealership_name', dealership_name, 'count', count, 'avg_cost', avg_cost))
+                        FROM (SELECT dealership_name, COUNT(*) as count, AVG(total_cost) as avg_cost
+                              FROM repair_orders 
+                              GROUP BY dealership_name 
+                              ORDER BY count DESC 
+                              LIMIT 5)) as top_dealerships
+                FROM repair_orders
             """)
-            top_dealerships = [dict(row) for row in cursor.fetchall()]
+            summary = cursor.fetchone()
+            total_ros = summary['total']
+            warranty_ros = summary['warranty_count']
+            avg_cost = summary['avg_cost'] or 0
+            status_breakdown = _json_rows(summary['status_breakdown'], sort_key='count')
+            top_dealerships = _json_rows(summary['top_dealerships'], sort_key='count')
         
         summary_stats = {
             'total_ros': total_ros,
@@ -570,11 +732,12 @@ def repair_orders():
             'top_dealerships': top_dealerships
         }
         
-        dealership_logger.info(f"Found {len(repair_orders)} repair orders")
+        dealership_logger.debug("Found %d repair orders", len(repair_orders))
         
         return render_template(
             'dealership/repair_orders.html',
             repair_orders=repair_orders,
+            pagination=pagination,
             stats=summary_stats,
             filters={
                 'vin': vin_filter,
@@ -596,7 +759,7 @@ def repair_orders():
 def vin_history():
     """Complete VIN history page"""
     try:
-        vin_number = request.args.get('vin', '').strip().upper()
+        vin_number = _vin_arg()
         
         if not vin_number:
             return render_template(
@@ -632,14 +795,14 @@ def api_tyre_complaints():
         
         tyre_data = WarrantyClaim.get_tyre_complaints_by_month(year, month)
         
-        return jsonify({
+        return _cacheable(ojsonify({
             'success': True,
             'data': tyre_data
-        })
+        }))
         
     except Exception as e:
         dealership_logger.error(f"Error getting tyre complaints: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
@@ -650,53 +813,88 @@ def api_dealership_stats():
     try:
         dealership_name = request.args.get('dealership')
         
-        # Get various statistics for the dealership
-        warranty_stats = WarrantyClaim.get_dealership_complaints(dealership_name)
-        ro_stats = RepairOrder.get_ro_statistics(dealership_name)
+        # Get various statistics for the dealership (cached for DEALERSHIP_STATS_TTL seconds)
+        warranty_stats, ro_stats = _get_dealership_stats(dealership_name)
         
-        return jsonify({
+        return _cacheable(ojsonify({
             'success': True,
             'warranty_stats': warranty_stats,
             'ro_stats': ro_stats
-        })
+        }))
         
     except Exception as e:
         dealership_logger.error(f"Error getting dealership stats: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+# CSV exports: type -> (header row, query producing the matching columns)
+EXPORTS = {
+    'warranty_claims': (
+        ['VIN', 'Dealership', 'Car Model', 'Claim Date', 'Problem', 'Status', 'Cost'],
+        """
+            SELECT vin_number, dealership_name, car_model, claim_date, 
+                   problem_description, status, cost
+            FROM warranty_claims 
+            ORDER BY claim_date DESC
+        """
+    ),
+    'pdi_inspections': (
+        ['VIN', 'Dealership', 'Car Model', 'Inspection Date', 'Status', 'Objections'],
+        """
+            SELECT vin_number, dealership_name, car_model, inspection_date, 
+                   pdi_status, objections
+            FROM pdi_inspections 
+            ORDER BY inspection_date DESC
+        """
+    ),
+}
+EXPORT_BATCH_SIZE = 500
+
 @log_function_call(dealership_logger)
 def export_data():
     """Export dealership data to CSV"""
     try:
         data_type = request.args.get('type', 'warranty_claims')
         
-        # Create CSV data based on type
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        if data_type == 'warranty_claims':
-            # Export warranty claims
-            writer.writerow(['VIN', 'Dealership', 'Car Model', 'Claim Date', 'Problem', 'Status', 'Cost'])
-            # Add actual data here
-            
-        elif data_type == 'pdi_inspections':
-            # Export PDI inspections
-            writer.writerow(['VIN', 'Dealership', 'Car Model', 'Inspection Date', 'Status', 'Objections'])
-            # Add actual data here
-        
-        output.seek(0)
-        
-        return jsonify({
-            'success': True,
-            'csv_data': output.getvalue()
-        })
+        if data_type not in EXPORTS:
+            return ojsonify({
+                'success': False,
+                'error': f"Unknown export type: {data_type}"
+            }), 400
+        
+        header, query = EXPORTS[data_type]
+        db = get_dealership_db()
+        
+        def generate():
+            # One small buffer reused per batch; rows go out as they are read
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(header)
+            yield output.getvalue()
+            
+            with db.connection() as conn:
+                cursor = conn.execute(query)
+                while True:
+                    rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    output.seek(0)
+                    output.truncate(0)
+                    writer.writerows(rows)
+                    yield output.getvalue()
+        
+        filename = f"{data_type}_{datetime.now().strftime('%Y-%m-%d')}.csv"
+        return Response(
+            generate(),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
         
     except Exception as e:
         dealership_logger.error(f"Error exporting data: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
         }), 500
\ No newline at end of file
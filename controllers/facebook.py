@@ -1,10 +1,277 @@
-from flask import render_template, request, jsonify, flash, url_for
+from flask import Response, render_template, request, flash, url_for
 from flask_login import current_user, login_required
 from utils.logger import server_logger, log_function_call, log_user_action, log_error
+from utils.json_response import ojsonify
+from utils.request_args import safe_int
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Any
+import time
+import zlib
+from collections import Counter
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import re2
+    HAS_RE2 = True
+except ImportError:
+    HAS_RE2 = False
+
+
+# Issue categories and the keywords (matched as substrings of lower-cased content) that flag them
+ISSUE_PATTERNS = (
+    ('head_unit', ('head unit', 'infotainment', 'screen', 'display', 'reboot', 'restart')),
+    ('cruise_control', ('cruise control', 'cruise', 'speed control')),
+    ('lane_assist', ('lane assist', 'lane departure', 'lane keep', 'lane warning')),
+    ('tpms', ('tpms', 'tire pressure', 'tyre pressure', 'pressure warning')),
+    ('ac_issues', ('ac', 'air conditioning', 'cooling', 'heating', 'climate')),
+    ('engine_issues', ('engine', 'motor', 'power', 'acceleration', 'rpm')),
+    ('brake_issues', ('brake', 'braking', 'abs', 'brake pedal')),
+    ('transmission', ('transmission', 'gear', 'shifting', 'cvt', 'gearbox')),
+    ('fuel_issues', ('fuel', 'mileage', 'consumption', 'average', 'efficiency')),
+    ('electrical', ('electrical', 'battery', 'charging', 'power', 'lights')),
+    ('suspension', ('suspension', 'shock', 'ride', 'comfort', 'bumpy')),
+    ('noise_issues', ('noise', 'sound', 'vibration', 'rattling', 'squeaking')),
+)
+
+# Display names, e.g. 'head_unit' -> 'Head Unit'
+ISSUE_TITLES = {issue_type: issue_type.replace('_', ' ').title() for issue_type, _ in ISSUE_PATTERNS}
+
+
+def _build_issue_automaton():
+    """Aho-Corasick automaton over every issue keyword -> the categories it flags"""
+    categories_by_keyword = {}
+    for issue_type, keywords in ISSUE_PATTERNS:
+        for keyword in keywords:
+            categories_by_keyword.setdefault(keyword, []).append(issue_type)
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, issue_types in categories_by_keyword.items():
+        automaton.add_word(keyword, tuple(issue_types))
+    automaton.make_automaton()
+    return automaton
+
+
+_ISSUE_AUTOMATON = _build_issue_automaton() if HAS_AHOCORASICK else None
+
+# Without pyahocorasick: one RE2 (DFA) alternation per category. Not done with
+# the stdlib re module, whose backtracking alternation is slower than the
+# plain substring checks below.
+_ISSUE_REGEXES = (
+    tuple((issue_type, re2.compile('|'.join(re2.escape(keyword) for keyword in keywords)))
+          for issue_type, keywords in ISSUE_PATTERNS)
+    if HAS_RE2 and not HAS_AHOCORASICK else None
+)
+
+
+def detect_issue_types(content_lower: str) -> List[str]:
+    """Issue categories (in ISSUE_PATTERNS order) mentioned in lower-cased post content"""
+    if _ISSUE_AUTOMATON is not None:
+        # One linear pass over the text for all keywords
+        hits = set()
+        for _, issue_types in _ISSUE_AUTOMATON.iter(content_lower):
+            hits.update(issue_types)
+        return [issue_type for issue_type in ISSUE_TITLES if issue_type in hits]
+    
+    if _ISSUE_REGEXES is not None:
+        return [issue_type for issue_type, regex in _ISSUE_REGEXES if regex.search(content_lower)]
+    
+    # Plain loops rather than any(<genexpr>): no generator per category
+    issue_types = []
+    for issue_type, keywords in ISSUE_PATTERNS:
+        for keyword in keywords:
+            if keyword in content_lower:
+                issue_types.append(issue_type)
+                break
+    return issue_types
+
+
+@lru_cache(maxsize=16384)
+def _parse_timestamp(timestamp_str: str) -> datetime:
+    """
+    Parse a post's ISO timestamp ('Z' suffix allowed). Memoized because the filter,
+    statistics and display paths all parse the same strings; raises ValueError if invalid.
+    """
+    return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+
+
+FACEBOOK_ISSUES_FILE = os.path.join('data', 'facebook_issues.json')
+
+# Buffer size for reading/writing the (multi-MB) post JSON files
+JSON_IO_BUFFER = 1 << 20
+
+# How long clients may reuse a Facebook API response without revalidating
+API_RESPONSE_MAX_AGE = 30
+
+# Cached statistics are recomputed at least this often so the
+# recent/weekly/monthly buckets follow the clock
+STATS_REFRESH_SECONDS = 300
+
+
+def _stats_window() -> int:
+    """Current STATS_REFRESH_SECONDS time slot"""
+    return int(time.time() // STATS_REFRESH_SECONDS)
+
+
+def _api_etag() -> Optional[str]:
+    """
+    ETag value for a Facebook API response: the data file version, the stats
+    time slot (the date filters and buckets move with the clock) and the query
+    args. None when the data file is missing.
+    """
+    try:
+        mtime_ns = os.stat(FACEBOOK_ISSUES_FILE).st_mtime_ns
+    except OSError:
+        return None
+    args = urlencode(sorted(request.args.items(multi=True)))
+    return f"{mtime_ns:x}-{_stats_window():x}-{zlib.crc32(args.encode()):08x}"
+
+
+def _not_modified(etag: Optional[str]) -> Optional[Response]:
+    """A 304 response if the client already holds `etag`, else None"""
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f'private, max-age={API_RESPONSE_MAX_AGE}'
+    return response
+
+
+def _dumps(obj) -> bytes:
+    """JSON-encode `obj` to bytes, with orjson when available"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+# Posts encoded per chunk of the streamed posts API response
+STREAM_CHUNK_POSTS = 100
+
+
+def _stream_posts_payload(posts: List[Dict[str, Any]], filters_applied: Dict[str, Any]):
+    """
+    Yield the api_facebook_posts JSON body a chunk of posts at a time, so the
+    whole payload never sits in memory as one string
+    """
+    yield b'{"success":true,"posts":['
+    for start in range(0, len(posts), STREAM_CHUNK_POSTS):
+        if start:
+            yield b','
+        yield b','.join(_dumps(post) for post in posts[start:start + STREAM_CHUNK_POSTS])
+    yield b'],"count":%d,"filters_applied":%s}' % (len(posts), _dumps(filters_applied))
+
+
+def _with_etag(response: Response, etag: Optional[str]) -> Response:
+    """Tag a successful API response so repeat requests can be answered with a 304"""
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = f'private, max-age={API_RESPONSE_MAX_AGE}'
+    return response
+
+# Parsed facebook_issues.json (and the customer list derived from it), reused until the file's mtime changes
+_POSTS_CACHE = {'mtime': None, 'data': None}
+
+
+def _enrich_posts(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add the display fields (processed_timestamp, message_preview, detected_issues,
+    primary_issue) to each post and sort newest first. Run once per file load so
+    requests only filter.
+    """
+    enriched = []
+    for post in posts:
+        content = post.get('content', '')
+        detected_issues = [ISSUE_TITLES[issue_type] for issue_type in detect_issue_types(content.lower())]
+        enriched.append(dict(
+            post,
+            processed_timestamp=format_timestamp(post.get('timestamp', '')),
+            message_preview=content[:100] + '...' if len(content) > 100 else content,
+            detected_issues=detected_issues,
+            primary_issue=detected_issues[0] if detected_issues else 'General',
+        ))
+    
+    enriched.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+    return enriched
+
+
+def _load_posts(json_file_path: str) -> List[Dict[str, Any]]:
+    """
+    Parsed and enriched posts from `json_file_path`, newest first. The returned
+    list (and its posts) is shared between requests; treat it as read-only.
+    """
+    st = os.stat(json_file_path)
+    if _POSTS_CACHE['mtime'] == st.st_mtime_ns:
+        return _POSTS_CACHE['data']
+    
+    if HAS_ORJSON:
+        with open(json_file_path, 'rb', buffering=JSON_IO_BUFFER) as f:
+            posts = orjson.loads(f.read())
+    else:
+        with open(json_file_path, 'r', encoding='utf-8', buffering=JSON_IO_BUFFER) as f:
+            posts = json.load(f)
+    posts = _enrich_posts(posts)
+    _POSTS_CACHE.update(mtime=st.st_mtime_ns, data=posts)
+    return posts
+
+
+# ?date= filter values -> how many days back they reach
+DATE_FILTER_DAYS = {'today': 1, 'recent': 3, 'week': 7, 'month': 30}
+
+# Column view of the cached posts list for vectorized filtering: lower-cased
+# message type / customer name, naive post datetime (NaT if unparseable or
+# timezone-aware, which the date filters never exclude), one bool column per
+# issue title and, when every date is present and newest-first, negated epoch
+# keys for bisecting the date cutoff
+_POSTS_FRAME = {'posts': None, 'frame': None, 'date_keys': None}
+
+
+def _posts_frame(posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Filter columns for `posts` (the cached list), rebuilt only when the list changes"""
+    global _POSTS_FRAME
+    cached = _POSTS_FRAME
+    if cached['posts'] is posts:
+        return cached
+    
+    dates = []
+    for post in posts:
+        try:
+            post_date = _parse_timestamp(post.get('timestamp', ''))
+        except ValueError:
+            post_date = None
+        dates.append(post_date if post_date is not None and post_date.tzinfo is None else None)
+    
+    frame = pd.DataFrame({
+        'message_type': [post.get('message_type', '').lower() for post in posts],
+        'customer_name': [post.get('customer_name', '').lower() for post in posts],
+        'date': pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce'),
+    })
+    for issue in ISSUE_TITLES.values():
+        frame[issue] = [issue in post['detected_issues'] for post in posts]
+    
+    date_keys = None
+    if all(dates) and all(a >= b for a, b in zip(dates, dates[1:])):
+        date_keys = [-d.timestamp() for d in dates]
+    
+    cached = _POSTS_FRAME = {'posts': posts, 'frame': frame, 'date_keys': date_keys}
+    return cached
 
 
 @log_function_call(server_logger)
@@ -13,7 +280,7 @@ def view_facebook():
     
     # Check if user has access to Facebook data (only Haval users)
     user_company = current_user.company_id or 'haval'
-    server_logger.info(f"Facebook view accessed by user {current_user.username} (company: {user_company})")
+    server_logger.info("Facebook view accessed by user %s (company: %s)", current_user.username, user_company)
     
     if user_company != 'haval':
         server_logger.warning(f"Facebook access denied for user {current_user.username} (company: {user_company})")
@@ -31,26 +298,32 @@ def view_facebook():
     customer_filter = request.args.get('customer', '')
     date_filter = request.args.get('date', 'all')
     
-    server_logger.info(f"Facebook filters applied by {current_user.username}: type={message_type_filter}, customer={customer_filter}, date={date_filter}")
+    server_logger.debug("Facebook filters applied by %s: type=%s, customer=%s, date=%s",
+                        current_user.username, message_type_filter, customer_filter, date_filter)
     
     try:
+        # Load the (cached) posts once and derive everything from that list
+        all_posts = _load_all_posts()
+        
         # Get Facebook posts
-        server_logger.info(f"Fetching Facebook posts for user {current_user.username}")
+        server_logger.debug("Fetching Facebook posts for user %s", current_user.username)
         posts = get_facebook_posts(
             message_type=message_type_filter,
             customer_name=customer_filter,
             date_filter=date_filter,
-            limit=1000
+            limit=1000,
+            posts=all_posts
         )
         
         # Get statistics
-        server_logger.info(f"Fetching Facebook statistics for user {current_user.username}")
-        stats = get_facebook_statistics()
+        server_logger.debug("Fetching Facebook statistics for user %s", current_user.username)
+        stats = get_facebook_statistics(all_posts)
         
         # Get unique customers for filter dropdown
-        customers = get_unique_customers()
+        customers = get_unique_customers(all_posts)
         
-        server_logger.info(f"Facebook data loaded successfully for user {current_user.username}: {len(posts)} posts, {len(customers)} customers")
+        server_logger.debug("Facebook data loaded for user %s: %d posts, %d customers",
+                            current_user.username, len(posts), len(customers))
         log_user_action("Facebook Data Viewed", current_user.id, f"Posts: {len(posts)}, Filters: type={message_type_filter}")
         
         return render_template("facebook/view_facebook.html", 
@@ -74,99 +347,72 @@ def view_facebook():
                              current_filters={})
 
 
-def get_facebook_posts(message_type='all', customer_name='', date_filter='all', issue_filter='all', limit=1000) -> List[Dict[str, Any]]:
-    """Load Facebook posts from JSON file with advanced filtering"""
+def _load_all_posts() -> List[Dict[str, Any]]:
+    """The cached, enriched posts list, or [] if the data file is missing"""
+    if not os.path.exists(FACEBOOK_ISSUES_FILE):
+        server_logger.error(f"Facebook data file not found: {FACEBOOK_ISSUES_FILE}")
+        return []
+    
+    posts = _load_posts(FACEBOOK_ISSUES_FILE)
+    server_logger.debug("Loaded %d Facebook posts from %s", len(posts), FACEBOOK_ISSUES_FILE)
+    return posts
+
+
+def get_facebook_posts(message_type='all', customer_name='', date_filter='all', issue_filter='all', limit=1000,
+                       posts=None) -> List[Dict[str, Any]]:
+    """
+    Load Facebook posts from JSON file with advanced filtering. Pass `posts`
+    (from _load_all_posts) to filter an already loaded list.
+    """
     
     try:
-        # Load Facebook posts from JSON file
-        json_file_path = os.path.join('data', 'facebook_issues.json')
+        if posts is None:
+            posts = _load_all_posts()
         
-        if not os.path.exists(json_file_path):
-            server_logger.error(f"Facebook data file not found: {json_file_path}")
+        if not posts:
             return []
         
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            posts = json.load(f)
-        
-        server_logger.info(f"Loaded {len(posts)} Facebook posts from {json_file_path}")
-        
-        # Define issue patterns for filtering
-        issue_patterns = {
-            'head_unit': ['head unit', 'infotainment', 'screen', 'display', 'reboot', 'restart'],
-            'cruise_control': ['cruise control', 'cruise', 'speed control'],
-            'lane_assist': ['lane assist', 'lane departure', 'lane keep', 'lane warning'],
-            'tpms': ['tpms', 'tire pressure', 'tyre pressure', 'pressure warning'],
-            'ac_issues': ['ac', 'air conditioning', 'cooling', 'heating', 'climate'],
-            'engine_issues': ['engine', 'motor', 'power', 'acceleration', 'rpm'],
-            'brake_issues': ['brake', 'braking', 'abs', 'brake pedal'],
-            'transmission': ['transmission', 'gear', 'shifting', 'cvt', 'gearbox'],
-            'fuel_issues': ['fuel', 'mileage', 'consumption', 'average', 'efficiency'],
-            'electrical': ['electrical', 'battery', 'charging', 'power', 'lights'],
-            'suspension': ['suspension', 'shock', 'ride', 'comfort', 'bumpy'],
-            'noise_issues': ['noise', 'sound', 'vibration', 'rattling', 'squeaking']
-        }
-        
-        # Apply filters
-        filtered_posts = []
-        
-        for post in posts:
-            # Message type filter
-            if message_type != 'all' and post.get('message_type', '').lower() != message_type.lower():
-                continue
-            
-            # Customer name filter
-            if customer_name and customer_name.lower() not in post.get('customer_name', '').lower():
-                continue
-            
-            # Date filter
-            if date_filter != 'all':
-                try:
-                    post_date = datetime.fromisoformat(post.get('timestamp', '').replace('Z', '+00:00'))
-                    now = datetime.now()
-                    
-                    if date_filter == 'today' and (now - post_date).days > 1:
-                        continue
-                    elif date_filter == 'week' and (now - post_date).days > 7:
-                        continue
-                    elif date_filter == 'month' and (now - post_date).days > 30:
-                        continue
-                    elif date_filter == 'recent' and (now - post_date).days > 3:
-                        continue
-                except:
-                    pass
-            
-            # Issue-specific filter
-            if issue_filter != 'all':
-                content_lower = post.get('content', '').lower()
-                issue_keywords = issue_patterns.get(issue_filter, [])
-                
-                if not any(keyword in content_lower for keyword in issue_keywords):
-                    continue
-            
-            # Add processed fields
-            post['processed_timestamp'] = format_timestamp(post.get('timestamp', ''))
-            post['message_preview'] = post.get('content', '')[:100] + '...' if len(post.get('content', '')) > 100 else post.get('content', '')
-            
-            # Detect and add issue categories
-            content_lower = post.get('content', '').lower()
-            detected_issues = []
-            for issue_type, keywords in issue_patterns.items():
-                if any(keyword in content_lower for keyword in keywords):
-                    detected_issues.append(issue_type.replace('_', ' ').title())
-            
-            post['detected_issues'] = detected_issues
-            post['primary_issue'] = detected_issues[0] if detected_issues else 'General'
-            
-            filtered_posts.append(post)
-        
-        # Sort by timestamp (newest first)
-        filtered_posts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
-        # Apply limit
+        # Build one boolean mask over the newest-first posts
+        index = _posts_frame(posts)
+        frame = index['frame']
+        mask = np.ones(len(posts), dtype=bool)
+        
+        # Message type filter
+        if message_type != 'all':
+            mask &= (frame['message_type'] == message_type.lower()).to_numpy()
+        
+        # Customer name filter
+        if customer_name:
+            mask &= frame['customer_name'].str.contains(customer_name.lower(), regex=False).to_numpy()
+        
+        # Date filter: a post is "within N days" while (now - post_date).days <= N
+        if date_filter in DATE_FILTER_DAYS:
+            cutoff = datetime.now() - timedelta(days=DATE_FILTER_DAYS[date_filter] + 1)
+            if index['date_keys'] is not None:
+                # Newest first, so the matching posts are a prefix of the list
+                mask[bisect_left(index['date_keys'], -cutoff.timestamp()):] = False
+            else:
+                mask &= (frame['date'].isna() | (frame['date'] > cutoff)).to_numpy()
+        
+        # Issue-specific filter
+        if issue_filter != 'all':
+            issue = ISSUE_TITLES.get(issue_filter)
+            if issue is None:
+                return []
+            mask &= frame[issue].to_numpy()
+        
+        # Posts are already sorted newest first; apply limit
+        positions = np.flatnonzero(mask)
         if limit:
-            filtered_posts = filtered_posts[:limit]
+            positions = positions[:limit]
+        if not len(positions) or positions[-1] == len(positions) - 1:
+            # A prefix of the list (no filters, or only the date bisect): one
+            # presized slice copy instead of growing a list item by item
+            filtered_posts = posts[:len(positions)]
+        else:
+            filtered_posts = [posts[i] for i in positions.tolist()]
         
-        server_logger.info(f"Filtered Facebook posts: {len(filtered_posts)} posts after filtering")
+        server_logger.debug("Filtered Facebook posts: %d posts after filtering", len(filtered_posts))
         return filtered_posts
         
     except Exception as e:
@@ -174,122 +420,138 @@ def get_facebook_posts(message_type='all', customer_name='', date_filter='all',
         return []
 
 
-def get_facebook_statistics() -> Dict[str, Any]:
-    """Get comprehensive Facebook posts statistics with issue analysis"""
+# Statistics / customer names computed from a posts list, reused while the
+# cached list (i.e. the data file version) is unchanged
+_STATS_CACHE = {'posts': None, 'window': None, 'data': None}
+_CUSTOMERS_CACHE = {'posts': None, 'data': None}
+
+
+def _stats_from(all_posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Statistics over the newest posts (the default get_facebook_posts window) of `all_posts`"""
+    posts = get_facebook_posts(posts=all_posts)  # Get all posts for stats
     
-    try:
-        posts = get_facebook_posts()  # Get all posts for stats
-        
-        if not posts:
-            return {}
-        
-        # Basic statistics
-        total_posts = len(posts)
-        complaints = len([p for p in posts if p.get('message_type', '').lower() == 'complaint'])
-        queries = len([p for p in posts if p.get('message_type', '').lower() == 'query'])
-        issues = len([p for p in posts if p.get('message_type', '').lower() == 'issue'])
-        
-        # Get unique customers
-        unique_customers = len(set(p.get('customer_name', '') for p in posts))
-        
-        # Date-based analysis
-        from datetime import datetime, timedelta
-        now = datetime.now()
-        
-        recent_posts = 0  # Last 3 days
-        weekly_posts = 0  # Last 7 days
-        monthly_posts = 0  # Last 30 days
-        
-        for post in posts:
-            try:
-                post_date = datetime.fromisoformat(post.get('timestamp', '').replace('Z', '+00:00'))
-                days_ago = (now - post_date).days
-                
-                if days_ago <= 3:
-                    recent_posts += 1
-                if days_ago <= 7:
-                    weekly_posts += 1
-                if days_ago <= 30:
-                    monthly_posts += 1
-            except:
-                pass
-        
-        # Issue analysis
-        issue_patterns = {
-            'head_unit': ['head unit', 'infotainment', 'screen', 'display', 'reboot', 'restart'],
-            'cruise_control': ['cruise control', 'cruise', 'speed control'],
-            'lane_assist': ['lane assist', 'lane departure', 'lane keep', 'lane warning'],
-            'tpms': ['tpms', 'tire pressure', 'tyre pressure', 'pressure warning'],
-            'ac_issues': ['ac', 'air conditioning', 'cooling', 'heating', 'climate'],
-            'engine_issues': ['engine', 'motor', 'power', 'acceleration', 'rpm'],
-            'brake_issues': ['brake', 'braking', 'abs', 'brake pedal'],
-            'transmission': ['transmission', 'gear', 'shifting', 'cvt', 'gearbox'],
-            'fuel_issues': ['fuel', 'mileage', 'consumption', 'average', 'efficiency'],
-            'electrical': ['electrical', 'battery', 'charging', 'power', 'lights'],
-            'suspension': ['suspension', 'shock', 'ride', 'comfort', 'bumpy'],
-            'noise_issues': ['noise', 'sound', 'vibration', 'rattling', 'squeaking']
-        }
+    if not posts:
+        return {}
+    
+    # Message types, customers, date buckets and issues, all counted in one pass
+    total_posts = len(posts)
+    raw_type_counts = Counter()
+    customer_names = set()
+    issue_counts = dict.fromkeys(ISSUE_TITLES.values(), 0)
+    now = datetime.now()
+    
+    recent_posts = 0  # Last 3 days
+    weekly_posts = 0  # Last 7 days
+    monthly_posts = 0  # Last 30 days
+    
+    for post in posts:
+        raw_type_counts[post.get('message_type', '')] += 1
+        customer_names.add(post.get('customer_name', ''))
         
-        issue_counts = {}
-        for issue_type, keywords in issue_patterns.items():
-            count = 0
-            for post in posts:
-                content_lower = post.get('content', '').lower()
-                if any(keyword in content_lower for keyword in keywords):
-                    count += 1
-            issue_counts[issue_type.replace('_', ' ').title()] = count
-        
-        # Sort issues by frequency
-        top_issues = sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        # Severity analysis (complaints are high severity)
-        high_severity = complaints
-        medium_severity = issues
-        low_severity = queries
-        
-        stats = {
-            'total_posts': total_posts,
-            'complaints': complaints,
-            'queries': queries,
-            'issues': issues,
-            'unique_customers': unique_customers,
-            'recent_posts': recent_posts,
-            'weekly_posts': weekly_posts,
-            'monthly_posts': monthly_posts,
-            'complaint_rate': round((complaints / total_posts * 100), 1) if total_posts > 0 else 0,
-            'query_rate': round((queries / total_posts * 100), 1) if total_posts > 0 else 0,
-            'issue_rate': round((issues / total_posts * 100), 1) if total_posts > 0 else 0,
-            'top_issues': dict(top_issues),
-            'severity_analysis': {
-                'high_severity': high_severity,
-                'medium_severity': medium_severity,
-                'low_severity': low_severity
-            },
-            'activity_trends': {
-                'daily_average': round(recent_posts / 3, 1) if recent_posts > 0 else 0,
-                'weekly_average': round(weekly_posts / 7, 1) if weekly_posts > 0 else 0,
-                'monthly_average': round(monthly_posts / 30, 1) if monthly_posts > 0 else 0
-            }
+        try:
+            post_date = _parse_timestamp(post.get('timestamp', ''))
+            days_ago = (now - post_date).days
+            
+            if days_ago <= 3:
+                recent_posts += 1
+            if days_ago <= 7:
+                weekly_posts += 1
+            if days_ago <= 30:
+                monthly_posts += 1
+        except:
+            pass
+        
+        for issue in post['detected_issues']:
+            issue_counts[issue] += 1
+    
+    # Lower-case the handful of distinct message types, not every post's
+    type_counts = Counter()
+    for message_type, count in raw_type_counts.items():
+        type_counts[message_type.lower()] += count
+    
+    complaints = type_counts['complaint']
+    queries = type_counts['query']
+    issues = type_counts['issue']
+    unique_customers = len(customer_names)
+    
+    # Sort issues by frequency
+    top_issues = sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    # Severity analysis (complaints are high severity)
+    high_severity = complaints
+    medium_severity = issues
+    low_severity = queries
+    
+    stats = {
+        'total_posts': total_posts,
+        'complaints': complaints,
+        'queries': queries,
+        'issues': issues,
+        'unique_customers': unique_customers,
+        'recent_posts': recent_posts,
+        'weekly_posts': weekly_posts,
+        'monthly_posts': monthly_posts,
+        'complaint_rate': round((complaints / total_posts * 100), 1) if total_posts > 0 else 0,
+        'query_rate': round((queries / total_posts * 100), 1) if total_posts > 0 else 0,
+        'issue_rate': round((issues / total_posts * 100), 1) if total_posts > 0 else 0,
+        'top_issues': dict(top_issues),
+        'severity_analysis': {
+            'high_severity': high_severity,
+            'medium_severity': medium_severity,
+            'low_severity': low_severity
+        },
+        'activity_trends': {
+            'daily_average': round(recent_posts / 3, 1) if recent_posts > 0 else 0,
+            'weekly_average': round(weekly_posts / 7, 1) if weekly_posts > 0 else 0,
+            'monthly_average': round(monthly_posts / 30, 1) if monthly_posts > 0 else 0
         }
+    }
+    
+    return stats
+
+
+def get_facebook_statistics(posts=None) -> Dict[str, Any]:
+    """
+    Get comprehensive Facebook posts statistics with issue analysis. `posts` is
+    the list from _load_all_posts, loaded here if not given. The returned dict
+    is shared between requests; don't mutate it.
+    """
+    
+    global _STATS_CACHE
+    try:
+        if posts is None:
+            posts = _load_all_posts()
         
-        server_logger.info(f"Facebook statistics calculated: {stats}")
-        return stats
+        # `window` (see _stats_window) lets the day buckets move on
+        window = _stats_window()
+        cached = _STATS_CACHE
+        if cached['posts'] is not posts or cached['window'] != window:
+            cached = _STATS_CACHE = {'posts': posts, 'window': window, 'data': _stats_from(posts)}
+        return cached['data']
         
     except Exception as e:
         server_logger.error(f"Error calculating Facebook statistics: {str(e)}")
         return {}
 
 
-def get_unique_customers() -> List[str]:
-    """Get list of unique customer names for filtering"""
+def get_unique_customers(posts=None) -> List[str]:
+    """
+    Get list of unique customer names for filtering. `posts` is the list from
+    _load_all_posts, loaded here if not given.
+    """
     
+    global _CUSTOMERS_CACHE
     try:
-        posts = get_facebook_posts()  # Get all posts
-        customers = list(set(p.get('CustomerName', '') for p in posts if p.get('CustomerName')))
-        customers.sort()
+        if posts is None:
+            posts = _load_all_posts()
         
-        server_logger.info(f"Found {len(customers)} unique Facebook customers")
-        return customers
+        cached = _CUSTOMERS_CACHE
+        if cached['posts'] is not posts:
+            customers = sorted({p.get('customer_name') for p in posts if p.get('customer_name')})
+            cached = _CUSTOMERS_CACHE = {'posts': posts, 'data': customers}
+            server_logger.info("Found %d unique Facebook customers", len(customers))
+        
+        return cached['data']
         
     except Exception as e:
         server_logger.error(f"Error getting unique customers: {str(e)}")
@@ -304,7 +566,7 @@ def format_timestamp(timestamp_str: str) -> str:
             return 'Unknown'
         
         # Parse ISO timestamp
-        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+        dt = _parse_timestamp(timestamp_str)
         
         # Format for display
         return dt.strftime('%Y-%m-%d %H:%M:%S')
@@ -349,10 +611,14 @@ def process_facebook_data_for_ai():
                 processed_data.append(processed_item)
         
         # Save processed data to facebook_issues.json
-        output_file = os.path.join('data', 'facebook_issues.json')
+        output_file = FACEBOOK_ISSUES_FILE
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, indent=2, ensure_ascii=False)
+        if HAS_ORJSON:
+            with open(output_file, 'wb', buffering=JSON_IO_BUFFER) as f:
+                f.write(orjson.dumps(processed_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w', encoding='utf-8', buffering=JSON_IO_BUFFER) as f:
+                json.dump(processed_data, f, indent=2, ensure_ascii=False)
         
         server_logger.info(f"Facebook data processed successfully: {len(processed_data)} items saved to {output_file}")
         
@@ -369,12 +635,33 @@ def api_facebook_posts():
     """API endpoint to get Facebook posts with advanced filtering"""
     
     try:
+        etag = _api_etag()
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
         # Get query parameters
         message_type = request.args.get('type', 'all')
         customer = request.args.get('customer', '')
         date_filter = request.args.get('date', 'all')
         issue_filter = request.args.get('issue', 'all')
-        limit = int(request.args.get('limit', 100))
+        limit = safe_int(request.args.get('limit'), 100)
+        
+        # Unknown date/issue filters would silently match everything/nothing
+        if date_filter != 'all' and date_filter not in DATE_FILTER_DAYS:
+            return ojsonify({
+                'success': False,
+                'error': f'Unknown date filter: {date_filter}',
+                'posts': [],
+                'count': 0
+            }, status=400)
+        if issue_filter != 'all' and issue_filter not in ISSUE_TITLES:
+            return ojsonify({
+                'success': False,
+                'error': f'Unknown issue filter: {issue_filter}',
+                'posts': [],
+                'count': 0
+            }, status=400)
         
         # Get posts with advanced filtering
         posts = get_facebook_posts(
@@ -385,26 +672,22 @@ def api_facebook_posts():
             limit=limit
         )
         
-        return jsonify({
-            'success': True,
-            'posts': posts,
-            'count': len(posts),
-            'filters_applied': {
-                'message_type': message_type,
-                'customer': customer,
-                'date_filter': date_filter,
-                'issue_filter': issue_filter
-            }
-        })
+        response = Response(_stream_posts_payload(posts, {
+            'message_type': message_type,
+            'customer': customer,
+            'date_filter': date_filter,
+            'issue_filter': issue_filter
+        }), mimetype='application/json')
+        return _with_etag(response, etag)
         
     except Exception as e:
         server_logger.error(f"Error in Facebook posts API: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e),
             'posts': [],
             'count': 0
-        }), 500
+        }, status=500)
 
 
 @log_function_call(server_logger)
@@ -450,7 +733,7 @@ def api_facebook_issue_insights():
             }
         }
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'insights': insights,
             'statistics': stats,
@@ -459,12 +742,12 @@ def api_facebook_issue_insights():
         
     except Exception as e:
         server_logger.error(f"Error in Facebook issue insights API: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e),
             'insights': {},
             'statistics': {}
-        }), 500
+        }, status=500)
 
 
 @log_function_call(server_logger)
@@ -472,20 +755,25 @@ def api_facebook_stats():
     """API endpoint to get Facebook statistics"""
     
     try:
+        etag = _api_etag()
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
         stats = get_facebook_statistics()
         
-        return jsonify({
+        return _with_etag(ojsonify({
             'success': True,
             'stats': stats
-        })
+        }), etag)
         
     except Exception as e:
         server_logger.error(f"Error in Facebook stats API: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e),
             'stats': {}
-        }), 500
+        }, status=500)
 
 
 @log_function_call(server_logger)
@@ -496,19 +784,19 @@ def api_process_facebook_data():
         success = process_facebook_data_for_ai()
         
         if success:
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'message': 'Facebook data processed successfully for AI analysis'
             })
         else:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Failed to process Facebook data'
-            }), 500
+            }, status=500)
         
     except Exception as e:
         server_logger.error(f"Error in Facebook data processing API: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }, status=500)
\ No newline at end of file
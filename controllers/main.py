@@ -2,10 +2,13 @@ from flask import render_template, request, redirect, url_for, send_file, jsonif
 from flask_login import login_required, current_user
 from controllers.scraping import (
     fetch_categories, collect_all_topics_from_category, 
-    fetch_posts_for_topic_via_json, export_topic_posts_to_files
+    fetch_posts_for_topic_via_json, export_topic_posts_to_files, enrich_plaintext,
+    fetch_topic_json, topic_unchanged_since_last_scrape, record_topic_state
 )
 from models.post import Post
 from models.database import get_user_data_dir
+from utils.request_args import safe_int
+from config.config_loader import get_config
 import os
 import time
 
@@ -48,7 +51,7 @@ def scrape_single_topic():
         return redirect(url_for('chatbot_advanced'))
     
     # Get form parameters
-    max_posts = int(request.form.get("max_posts", 1000))
+    max_posts = safe_int(request.form.get("max_posts"), 1000, hi=None)
     fetch_mode = request.form.get("fetch_mode", "latest")  # "latest" or "oldest"
     
     # Validate max_posts
@@ -62,14 +65,25 @@ def scrape_single_topic():
         # Determine if we want descending order (latest first)
         descending = (fetch_mode == "latest")
         
+        # Skip the full fetch if the thread hasn't grown since our last identical scrape
+        topic_data = fetch_topic_json(thread_url)
+        highest_post_number = topic_data.get("highest_post_number") if topic_data else None
+        if highest_post_number is not None and topic_unchanged_since_last_scrape(
+                thread_url, current_user.id, user_company, highest_post_number, max_posts, descending):
+            flash(f"ℹ️ No new posts in the {company_name} thread since the last scrape (up to post #{highest_post_number}).", "info")
+            return redirect(url_for('chatbot_advanced'))
+        
         flash(f"Starting to scrape {company_name} discussion thread...", "info")
         flash(f"Target: {max_posts} posts ({'latest' if descending else 'oldest'} first)", "info")
         
-        # Fetch posts from the thread
+        # Fetch posts from the thread, reusing the topic JSON just fetched for the check
+        # above; an explicit scrape never reuses cached topic JSON
         posts = fetch_posts_for_topic_via_json(
             topic_url=thread_url,
             max_posts=max_posts,
-            descending=descending
+            descending=descending,
+            force_refresh=True,
+            topic_data=topic_data
         )
         
         if not posts:
@@ -82,6 +96,9 @@ def scrape_single_topic():
             flash("💡 Please check the thread URL and try again later", "info")
             return redirect(url_for('chatbot_advanced'))
         
+        # Strip the HTML once for both the database and the CSV export
+        enrich_plaintext(posts)
+        
         # Save posts to database
         saved_count, skipped_count = Post.save_posts_to_db(
             category_name=f"{company_name} Discussion",
@@ -89,8 +106,11 @@ def scrape_single_topic():
             topic_url=thread_url,
             posts=posts,
             user_id=current_user.id,
-            company_id=user_company
+            company_id=user_company,
+            dedupe_content=get_config().get('scraping.dedupe_content', False)
         )
+        if highest_post_number is not None:
+            record_topic_state(thread_url, current_user.id, user_company, highest_post_number, max_posts, descending)
         
         # Export to files
         json_path, csv_path = export_topic_posts_to_files(
@@ -1,14 +1,32 @@
 import os
+import csv
+import random
+import re
 import time
 import json
+import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-import pandas as pd
-from urllib.parse import urljoin
-from tqdm import tqdm
+from lxml import html as lxml_html
+from urllib.parse import urlencode, urljoin, urlsplit, urlunsplit
 from flask import current_app
 from models.database import get_db_connection
+from models.post import Post
 from utils.logger import scraping_logger, warning_logger, log_error
+from utils.html_text import cooked_to_text, post_text
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import requests_cache
+    HAS_REQUESTS_CACHE = True
+except ImportError:
+    HAS_REQUESTS_CACHE = False
 
 # Configuration
 BASE = "https://www.pakwheels.com/forums/"
@@ -21,10 +39,38 @@ HEADERS = {
 DEFAULT_DELAY = 0.6
 DEFAULT_MAX_TOPICS = 500
 DEFAULT_MAX_POSTS = 10000
+# Topic URLs fetch_posts_for_topic_via_json accepts
+ALLOWED_TOPIC_PREFIXES = ("https://www.pakwheels.com/forums/t/",)
+# Category pages / topics fetched at once (matches the session's connection pool headroom)
+DEFAULT_CONCURRENCY = 8
+
+# On-disk HTTP cache (requests-cache, when installed): topic JSON is reused for
+# an hour and category listings for 5 minutes, revalidated with ETag/Last-Modified
+HTTP_CACHE_PATH = os.path.join(DATA_DIR, "http_cache.sqlite")
+HTTP_CACHE_EXPIRE = 3600
+CATEGORY_CACHE_EXPIRE = 300
+
+# One pooled session for every forum request, so repeated calls reuse the
+# TCP/TLS connection to pakwheels.com instead of reconnecting each time
+if HAS_REQUESTS_CACHE:
+    SESSION = requests_cache.CachedSession(
+        HTTP_CACHE_PATH,
+        backend="sqlite",
+        expire_after=HTTP_CACHE_EXPIRE,
+        urls_expire_after={"pakwheels.com/forums/c/*": CATEGORY_CACHE_EXPIRE},
+        cache_control=True,
+        allowable_codes=(200,),
+    )
+else:
+    SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
 
 def get_soup(url, timeout=15):
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
+        resp = SESSION.get(url, timeout=timeout)
         resp.raise_for_status()
         return BeautifulSoup(resp.text, "lxml")
     except Exception as e:
@@ -32,19 +78,57 @@ def get_soup(url, timeout=15):
         return None
 
 
-def get_json(url, timeout=15, max_retries=3):
+def get_html_tree(url, timeout=15):
+    """Like get_soup, but a bare lxml tree (no BeautifulSoup wrapper) for simple link scans"""
+    try:
+        resp = SESSION.get(url, timeout=timeout)
+        resp.raise_for_status()
+        return lxml_html.fromstring(resp.content)
+    except Exception as e:
+        scraping_logger.warning(f"Failed to GET {url}: {e}")
+        return None
+
+
+# Longest a single retry wait may be, whatever the backoff or Retry-After says
+MAX_RETRY_DELAY = 30
+
+
+def _jitter():
+    """Random 1.0-1.5x factor so concurrent workers don't retry in lockstep"""
+    return 1 + random.random() * 0.5
+
+
+def _backoff_delay(attempt):
+    """Jittered exponential backoff before retry number `attempt` + 1"""
+    return min(MAX_RETRY_DELAY, (2 ** attempt) * _jitter())
+
+
+def _retry_after_seconds(response):
+    """The response's Retry-After (delay-seconds form) capped at MAX_RETRY_DELAY, or None"""
+    retry_after = (response.headers.get("Retry-After") or "").strip()
+    if not retry_after.isdigit():
+        return None
+    return min(MAX_RETRY_DELAY, int(retry_after))
+
+
+def get_json(url, timeout=15, max_retries=3, force_refresh=False):
     """
-    Fetch JSON data from URL with retry mechanism and better error handling
+    Fetch JSON data from URL with retry mechanism and better error handling.
+    With `force_refresh`, skip any cached copy for this request (the fresh
+    response still replaces it in the HTTP cache).
     """
+    # Per-request bypass; SESSION.cache_disabled() would flip it for every thread
+    request_kwargs = {"force_refresh": True} if force_refresh and HAS_REQUESTS_CACHE else {}
     for attempt in range(max_retries):
         try:
-            scraping_logger.info(f"🔍 Fetching JSON (attempt {attempt + 1}/{max_retries}): {url}")
-            resp = requests.get(url, headers=HEADERS, timeout=timeout)
+            scraping_logger.debug("🔍 Fetching JSON (attempt %d/%d): %s", attempt + 1, max_retries, url)
+            resp = SESSION.get(url, timeout=timeout, **request_kwargs)
             
-            # Log response details for debugging
-            scraping_logger.info(f"📊 Response status: {resp.status_code}")
-            scraping_logger.info(f"📊 Response headers: {dict(resp.headers)}")
-            scraping_logger.info(f"📊 Response content preview: {resp.text[:200]}...")
+            # Log response details for debugging (headers dict / body decode only when enabled)
+            if scraping_logger.isEnabledFor(logging.DEBUG):
+                scraping_logger.debug("📊 Response status: %s", resp.status_code)
+                scraping_logger.debug("📊 Response headers: %s", dict(resp.headers))
+                scraping_logger.debug("📊 Response content preview: %s...", resp.text[:200])
             
             resp.raise_for_status()
             
@@ -67,10 +151,10 @@ def get_json(url, timeout=15, max_retries=3):
             
             # Try to parse JSON
             try:
-                json_data = resp.json()
-                scraping_logger.info(f"✅ Successfully parsed JSON response")
+                json_data = orjson.loads(resp.content) if HAS_ORJSON else resp.json()
+                scraping_logger.debug("✅ Successfully parsed JSON response")
                 return json_data
-            except json.JSONDecodeError as json_err:
+            except ValueError as json_err:  # json / orjson JSONDecodeError
                 scraping_logger.warning(f"❌ JSON decode error: {json_err}")
                 scraping_logger.warning(f"Response preview: {resp.text[:500]}...")
                 if 'page not found' in resp.text.lower():
@@ -81,33 +165,79 @@ def get_json(url, timeout=15, max_retries=3):
         except requests.exceptions.Timeout:
             scraping_logger.warning(f"⏰ Timeout fetching JSON from {url} (attempt {attempt + 1}/{max_retries})")
             if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)  # Exponential backoff
+                time.sleep(_backoff_delay(attempt))  # Exponential backoff
         except requests.exceptions.ConnectionError:
             scraping_logger.warning(f"🔗 Connection error fetching JSON from {url} (attempt {attempt + 1}/{max_retries})")
             if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)  # Exponential backoff
+                time.sleep(_backoff_delay(attempt))  # Exponential backoff
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 scraping_logger.warning(f"📄 Post not found (404): {url}")
                 return None  # Don't retry for 404s
-            elif e.response.status_code == 429:
-                scraping_logger.warning(f"🚫 Rate limited (429): {url} (attempt {attempt + 1}/{max_retries})")
+            elif e.response.status_code in (429, 503):
+                scraping_logger.warning(f"🚫 Rate limited ({e.response.status_code}): {url} (attempt {attempt + 1}/{max_retries})")
                 if attempt < max_retries - 1:
-                    time.sleep(5 * (attempt + 1))  # Longer wait for rate limiting
+                    # Server's Retry-After if given, else a longer wait for rate limiting
+                    retry_after = _retry_after_seconds(e.response)
+                    time.sleep(retry_after if retry_after is not None
+                               else min(MAX_RETRY_DELAY, 5 * (attempt + 1) * _jitter()))
             else:
                 scraping_logger.warning(f"🌐 HTTP error {e.response.status_code} fetching JSON from {url} (attempt {attempt + 1}/{max_retries})")
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+                    time.sleep(_backoff_delay(attempt))
         except Exception as e:
             scraping_logger.warning(f"❌ Failed to GET JSON {url} (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
+                time.sleep(_backoff_delay(attempt))
     
     scraping_logger.error(f"💥 Failed to fetch JSON after {max_retries} attempts: {url}")
     return None
 
 
-def fetch_categories():
+# Category list cache: in memory, plus a copy on disk for process restarts
+CATEGORIES_TTL = 86400
+CATEGORIES_CACHE_PATH = os.path.join(DATA_DIR, "categories.json")
+_CATEGORIES_CACHE = {"ts": 0, "data": None}
+
+
+def _load_cached_categories():
+    """Categories saved by an earlier process, with their save time, or (0, None)"""
+    try:
+        with open(CATEGORIES_CACHE_PATH, "r", encoding="utf-8") as f:
+            return os.path.getmtime(CATEGORIES_CACHE_PATH), json.load(f)
+    except (OSError, ValueError):
+        return 0, None
+
+
+def fetch_categories(ttl=CATEGORIES_TTL):
+    """
+    Category links (unique) from the forum main page, re-scraped at most every
+    `ttl` seconds. If a re-scrape fails, the last known list is returned.
+    """
+    global _CATEGORIES_CACHE
+    cached = _CATEGORIES_CACHE
+    if cached["data"] is None:
+        ts, data = _load_cached_categories()
+        cached = _CATEGORIES_CACHE = {"ts": ts, "data": data}
+    
+    now = time.time()
+    if cached["data"] and now - cached["ts"] < ttl:
+        return cached["data"]
+    
+    cats = _scrape_categories()
+    if not cats:
+        return cached["data"] or []
+    
+    _CATEGORIES_CACHE = {"ts": now, "data": cats}
+    try:
+        with open(CATEGORIES_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(cats, f, ensure_ascii=False)
+    except OSError as e:
+        scraping_logger.warning(f"Could not save category cache: {e}")
+    return cats
+
+
+def _scrape_categories():
     """Scrape forum main page and return category links (unique)."""
     soup = get_soup(BASE)
     if not soup:
@@ -129,48 +259,136 @@ def fetch_categories():
     return cats
 
 
-def collect_all_topics_from_category(category_url, delay=DEFAULT_DELAY, max_topics=DEFAULT_MAX_TOPICS):
+def _category_page_url(category_url, page):
+    # Discourse uses ?page=N for forum category pagination
+    return category_url if page == 1 else f"{category_url}?page={page}"
+
+
+def _topic_links(category_url, page):
+    """(title, href) for every topic link on one category page, or None if the page failed"""
+    url = _category_page_url(category_url, page)
+    scraping_logger.info(f"Fetching topic list: {url}")
+    tree = get_html_tree(url)
+    if tree is None:
+        return None
+    
+    links = []
+    for a in tree.iterfind(".//a[@href]"):
+        href = a.get("href")
+        if "/t/" not in href:
+            continue
+        # Same as BeautifulSoup's get_text(strip=True): stripped pieces, no separator
+        title = "".join(piece.strip() for piece in a.itertext())
+        links.append((title, urljoin(category_url, href)))
+    return links
+
+
+def collect_all_topics_from_category(category_url, delay=DEFAULT_DELAY, max_topics=DEFAULT_MAX_TOPICS,
+                                     concurrency=DEFAULT_CONCURRENCY):
     """
     Walk pagination for a category and collect topic titles + urls until end or max_topics reached.
-    Returns list of {title, href}
+    Pages are fetched `concurrency` at a time (with `delay` between batches) and
+    merged in page order. Returns list of {title, href}
     """
     topics = []
     seen = set()
     page = 1
-    while True:
-        if page == 1:
-            url = category_url
-        else:
-            # Discourse uses ?page=N for forum category pagination
-            url = f"{category_url}?page={page}"
-        scraping_logger.info(f"Fetching topic list: {url}")
-        soup = get_soup(url)
-        if not soup:
-            break
-
-        found_on_page = 0
-        for a in soup.select("a[href*='/t/']"):
-            href = a.get("href")
-            if not href:
-                continue
-            full = urljoin(category_url, href)
-            title = a.get_text(strip=True)
-            if not title or full in seen:
-                continue
-            topics.append({"title": title, "href": full})
-            seen.add(full)
-            found_on_page += 1
-            if len(topics) >= max_topics:
-                return topics
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            # Page 1 on its own (most categories end there), then batches
+            batch = 1 if page == 1 else concurrency
+            results = pool.map(lambda n: _topic_links(category_url, n), range(page, page + batch))
+            
+            for links in results:
+                if not links:
+                    return topics
+                
+                found_on_page = 0
+                for title, full in links:
+                    if not title or full in seen:
+                        continue
+                    topics.append({"title": title, "href": full})
+                    seen.add(full)
+                    found_on_page += 1
+                    if len(topics) >= max_topics:
+                        return topics
+                
+                if found_on_page == 0:
+                    return topics
+            
+            page += batch
+            time.sleep(delay)
 
-        if found_on_page == 0:
-            break
-        page += 1
-        time.sleep(delay)
-    return topics
 
+def _topic_base_url(topic_url):
+    """Topic URL without query, fragment and trailing slash"""
+    parts = urlsplit(topic_url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip("/"), "", ""))
 
-def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay=DEFAULT_DELAY, descending=False):
+
+def fetch_topic_json(topic_url):
+    """
+    The topic's JSON fresh from the server (never a cached copy, which could hide
+    posts added since it was stored), or None if unavailable. Its
+    highest_post_number tells whether the topic grew; pass it on to
+    fetch_posts_for_topic_via_json(topic_data=...) so it isn't downloaded twice.
+    """
+    data = get_json(_topic_base_url(topic_url) + ".json", force_refresh=True)
+    return data if isinstance(data, dict) else None
+
+
+def topic_unchanged_since_last_scrape(topic_url, user_id, company_id, highest_post_number, max_posts, descending):
+    """
+    True if this user/company last scraped `topic_url` with the same settings
+    when it was already at `highest_post_number` (i.e. nothing new to fetch)
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute("""
+            SELECT highest_post_number, max_posts, descending FROM topic_state
+            WHERE topic_url = ? AND user_id = ? AND company_id = ?
+        """, (topic_url, user_id, company_id)).fetchone()
+    finally:
+        conn.close()
+    return (row is not None and row[0] is not None
+            and highest_post_number <= row[0]
+            and row[1] == max_posts and bool(row[2]) == bool(descending))
+
+
+def record_topic_state(topic_url, user_id, company_id, highest_post_number, max_posts, descending):
+    """Remember how far `topic_url` was scraped for this user/company"""
+    conn = get_db_connection()
+    try:
+        conn.execute("""
+            INSERT OR REPLACE INTO topic_state
+                (topic_url, user_id, company_id, highest_post_number, max_posts, descending, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (topic_url, user_id, company_id, highest_post_number, max_posts, bool(descending)))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Discourse serves at most this many posts per posts.json?post_ids[]= request
+STREAM_CHUNK_SIZE = 20
+
+
+def _fetch_stream_posts(topic_id, post_ids, concurrency=DEFAULT_CONCURRENCY):
+    """Posts of `topic_id` with the given ids, fetched STREAM_CHUNK_SIZE at a time in parallel"""
+    def fetch_chunk(chunk):
+        query = urlencode([("post_ids[]", post_id) for post_id in chunk])
+        data = get_json(f"{BASE}t/{topic_id}/posts.json?{query}")
+        if not isinstance(data, dict):
+            return []
+        return (data.get("post_stream") or {}).get("posts") or []
+    
+    chunks = [post_ids[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(post_ids), STREAM_CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [post for posts in pool.map(fetch_chunk, chunks) for post in posts]
+
+
+def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay=DEFAULT_DELAY, descending=False,
+                                   force_refresh=False, topic_data=None):
     """
     Fetch posts from a Discourse topic using JSON API.
     Gets LATEST posts when descending=True, OLDEST posts when descending=False.
@@ -180,16 +398,18 @@ def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay
         max_posts: Maximum number of posts to fetch
         delay: Delay between requests (not used in simplified version)
         descending: If True, fetch latest posts first (newest to oldest)
+        force_refresh: If True, don't use a cached copy of the topic JSON
+        topic_data: The topic JSON if the caller already fetched it (see fetch_topic_json)
     """
-    # Clean URL and validate format
-    base_url = topic_url.rstrip("/").split("?")[0].split("#")[0]
+    # Clean URL (drop query, fragment and trailing slash) and validate format
+    base_url = _topic_base_url(topic_url)
     
     # Log the original and cleaned URLs for debugging
     scraping_logger.info(f"🔗 Original URL: {topic_url}")
     scraping_logger.info(f"🔗 Cleaned base URL: {base_url}")
     
     # Ensure the URL is in the correct format for PakWheels
-    if not base_url.startswith("https://www.pakwheels.com/forums/t/"):
+    if not base_url.startswith(ALLOWED_TOPIC_PREFIXES):
         scraping_logger.error(f"❌ Invalid PakWheels URL format: {base_url}")
         scraping_logger.error("Expected format: https://www.pakwheels.com/forums/t/topic-name/topic-id")
         return []
@@ -197,20 +417,14 @@ def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay
     json_url = base_url + ".json"
     scraping_logger.info(f"🔍 JSON URL: {json_url}")
     
-    # Test basic connectivity first
-    try:
-        test_resp = requests.head(base_url, headers=HEADERS, timeout=10)
-        scraping_logger.info(f"🌐 Base URL connectivity test: {test_resp.status_code}")
-    except Exception as e:
-        scraping_logger.warning(f"⚠️ Base URL connectivity test failed: {e}")
-    
-    scraping_logger.info(f"🔍 Fetching topic: {json_url}")
+    if topic_data is None:
+        scraping_logger.info(f"🔍 Fetching topic: {json_url}")
     
     # Try to get more posts if we want latest posts
     if descending:
         # For latest posts, try different approaches
         # First try the regular endpoint to see what we get
-        data = get_json(json_url)
+        data = topic_data if topic_data is not None else get_json(json_url, force_refresh=force_refresh)
         
         if data:
             # Get topic metadata to check post numbers
@@ -226,7 +440,7 @@ def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay
                     # If we're missing recent posts (more than 100 posts behind), try print version
                     if max_found < highest_post_number - 100:
                         scraping_logger.info(f"📡 Default response has posts up to #{max_found}, trying print version for more recent posts")
-                        print_data = get_json(f"{json_url}?print=true")
+                        print_data = get_json(f"{json_url}?print=true", force_refresh=force_refresh)
                         if print_data:
                             print_post_stream = print_data.get("post_stream", {})
                             print_posts = print_post_stream.get("posts", [])
@@ -235,7 +449,7 @@ def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay
                                 data = print_data
     else:
         # Use regular endpoint for oldest posts
-        data = get_json(json_url)
+        data = topic_data if topic_data is not None else get_json(json_url, force_refresh=force_refresh)
     
     if not data:
         scraping_logger.error(f"❌ Failed to fetch topic data from: {json_url}")
@@ -275,6 +489,16 @@ def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay
     posts_data = post_stream.get("posts", [])
     scraping_logger.info(f"📊 Found {len(posts_data)} posts in response")
     
+    # The topic JSON only embeds the first chunk of posts; fetch the rest of
+    # the wanted ids listed in post_stream.stream
+    stream_ids = post_stream.get("stream") or []
+    wanted_ids = stream_ids[-max_posts:] if descending else stream_ids[:max_posts]
+    have_ids = {p.get("id") for p in posts_data if isinstance(p, dict)}
+    missing_ids = [post_id for post_id in wanted_ids if post_id not in have_ids]
+    if missing_ids and data.get("id"):
+        scraping_logger.info(f"📡 Fetching {len(missing_ids)} more posts listed in the topic stream")
+        posts_data = posts_data + _fetch_stream_posts(data["id"], missing_ids)
+    
     # Process posts
     all_posts = []
     seen_post_ids = set()
@@ -335,70 +559,82 @@ def fetch_posts_for_topic_via_json(topic_url, max_posts=DEFAULT_MAX_POSTS, delay
     return all_posts
 
 
-def save_posts_to_db(category_name, topic_title, topic_url, posts, user_id, company_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    saved_count = 0
-    skipped_count = 0
-
-    print(f"💾 Saving {len(posts)} posts to database...")
-    for p in tqdm(posts, desc="💾 Saving posts", unit="post", ncols=100):
-        post_number = p.get("post_number")
-
-        # Check if post already exists for this user and company
-        cur.execute("""
-            SELECT COUNT(*) FROM posts 
-            WHERE post_number = ? AND topic_url = ? AND user_id = ? AND company_id = ?
-        """, (post_number, topic_url, user_id, company_id))
-        
-        exists = cur.fetchone()[0] > 0
-        
-        if exists:
-            skipped_count += 1
-            continue
-        
-        text = p.get("cooked") or ""
-        # store raw cooked HTML and also store plain text trimmed
-        plain = BeautifulSoup(text, "lxml").get_text(" ", strip=True) if text else ""
-        
-        cur.execute("""
-            INSERT INTO posts (user_id, company_id, category, topic_title, topic_url, post_number, author, created_at, cooked_text)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, company_id, category_name, topic_title, topic_url, post_number, p.get("username"), p.get("created_at"), plain))
-        saved_count += 1
-    
-    conn.commit()
-    conn.close()
-    
+def enrich_plaintext(posts):
+    """
+    Strip each post's cooked HTML once, into post["plain_text"], so saving and
+    exporting don't both parse it. "cooked" is kept; the AI pipeline reads it.
+    """
+    for p in posts:
+        p["plain_text"] = cooked_to_text(p.get("cooked") or "")
+    return posts
+
+
+def save_posts_to_db(category_name, topic_title, topic_url, posts, user_id, company_id, conn=None,
+                     dedupe_content=False):
+    """Store a topic's new posts (see Post.save_posts_to_db)"""
+    saved_count, skipped_count = Post.save_posts_to_db(
+        category_name, topic_title, topic_url, posts, user_id, company_id,
+        conn=conn, dedupe_content=dedupe_content
+    )
     scraping_logger.info(f"Saved {saved_count} new posts, skipped {skipped_count} duplicates")
     return saved_count, skipped_count
 
 
+CSV_FIELDS = ["post_number", "author", "created_at", "content"]
+
+# Characters replaced by "_" in export file names: anything but letters/digits
+# (Unicode, as str.isalnum), space, "-" and "_"
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w \-]")
+
+
+def _dumps(obj):
+    """JSON-encode `obj` to UTF-8 bytes, with orjson when available"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _write_topic_json(json_path, topic_title, topic_url, posts):
+    # JSON, streamed a post at a time (compact; one post per line)
+    with open(json_path, "wb") as f:
+        f.write(b'{"topic": ' + _dumps(topic_title) + b', "url": ' + _dumps(topic_url) + b', "posts": [')
+        for i, p in enumerate(posts):
+            f.write(b",\n" if i else b"\n")
+            f.write(_dumps(p))
+        f.write(b"\n]}\n")
+
+
+def _write_topic_csv(csv_path, posts):
+    # CSV (flatten), written row by row
+    rows = ({
+        "post_number": p.get("post_number"),
+        "author": p.get("username"),
+        "created_at": p.get("created_at"),
+        "content": post_text(p)
+    } for p in posts)
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# Writes a topic's JSON and CSV exports side by side
+_export_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="topic-export")
+
+
 def export_topic_posts_to_files(category_slug, topic_title, topic_url, posts):
     """Save per-topic JSON and CSV in data/"""
     safe_slug = category_slug.replace("/", "_")
-    topic_safe = "".join(c if c.isalnum() or c in (" ", "-", "_") else "_" for c in topic_title)[:100]
+    topic_safe = _UNSAFE_FILENAME_RE.sub("_", topic_title)[:100]
     base = os.path.join(DATA_DIR, f"{safe_slug}__{topic_safe}")
     json_path = base + ".json"
     csv_path = base + ".csv"
 
-    # JSON
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({"topic": topic_title, "url": topic_url, "posts": posts}, f, ensure_ascii=False, indent=2)
-
-    # CSV (flatten)
-    rows = []
-    for p in posts:
-        text = p.get("cooked") or ""
-        plain = BeautifulSoup(text, "lxml").get_text(" ", strip=True) if text else ""
-        rows.append({
-            "post_number": p.get("post_number"),
-            "author": p.get("username"),
-            "created_at": p.get("created_at"),
-            "content": plain
-        })
-    df = pd.DataFrame(rows)
-    df.to_csv(csv_path, index=False, encoding="utf-8")
+    # Write both files at once, overlapping their disk I/O; wait for both so
+    # callers can hand the JSON straight to the AI pipeline
+    json_future = _export_executor.submit(_write_topic_json, json_path, topic_title, topic_url, posts)
+    csv_future = _export_executor.submit(_write_topic_csv, csv_path, posts)
+    json_future.result()
+    csv_future.result()
 
     return json_path, csv_path
\ No newline at end of file
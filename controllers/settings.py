@@ -3,12 +3,70 @@ Settings controller for managing application configuration.
 Provides web interface for editing server settings, feature flags, and other configuration options.
 """
 
-from flask import render_template, request, jsonify, flash, redirect, url_for
+from flask import render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
+from werkzeug.utils import safe_join
 from config.config_loader import get_config, reload_config
 from utils.logger import server_logger
 from utils.logging_config import LoggingConfigManager
+from utils.json_response import ojsonify
+from utils.cache import ttl_cache
+from functools import lru_cache
 import json
+import os
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# Shared logging manager; its config file and the logs directory listing are
+# re-read at most every LOGGING_CACHE_TTL seconds (sooner after changes made here)
+LOGGING_CACHE_TTL = 60
+_logging_manager = LoggingConfigManager()
+
+
+@ttl_cache(LOGGING_CACHE_TTL, maxsize=1)
+def _logging_config():
+    return _logging_manager.load_config()
+
+
+@ttl_cache(LOGGING_CACHE_TTL, maxsize=1)
+def _log_files():
+    return _logging_manager.list_log_files()
+
+
+def _invalidate_logging_cache():
+    """Drop the cached logging config and log file list after a change"""
+    _logging_config.cache_clear()
+    _log_files.cache_clear()
+
+
+# Values derived from the app config, memoized per config version (see
+# ConfigLoader.touch). The returned dicts are shared between requests: read only.
+@lru_cache(maxsize=4)
+def _exported_config(version):
+    return get_config().export_config()
+
+
+@lru_cache(maxsize=4)
+def _feature_flags(version):
+    return dict(get_config().get_feature_flags())
+
+
+@lru_cache(maxsize=4)
+def _server_info(version):
+    config = get_config()
+    return {
+        'host': config.get('server.host'),
+        'port': config.get('server.port'),
+        'debug_mode': config.get('server.debug'),
+        'auto_reload': config.get('server.auto_reload'),
+        'is_production': config.is_production(),
+        'maintenance_mode': config.is_maintenance_mode()
+    }
 
 
 def settings_page():
@@ -20,30 +78,22 @@ def settings_page():
         # In production, you might want to add role-based access control
         
         # Get current configuration (excluding sensitive data)
-        current_config = config.export_config()
+        current_config = _exported_config(config._version)
         
         # Get server status information
-        server_info = {
-            'host': config.get('server.host'),
-            'port': config.get('server.port'),
-            'debug_mode': config.get('server.debug'),
-            'auto_reload': config.get('server.auto_reload'),
-            'is_production': config.is_production(),
-            'maintenance_mode': config.is_maintenance_mode()
-        }
+        server_info = _server_info(config._version)
         
         # Get feature flags
-        features = config.get_feature_flags()
+        features = _feature_flags(config._version)
         
         # Get user's company features
         user_company = current_user.company_id or 'haval'
         company_features = config.get_company_features(user_company)
         
         # Get logging configuration
-        logging_manager = LoggingConfigManager()
-        logging_config = logging_manager.load_config()
-        log_levels = logging_manager.get_log_levels()
-        log_files = logging_manager.list_log_files()
+        logging_config = _logging_config()
+        log_levels = _logging_manager.get_log_levels(logging_config)
+        log_files = _log_files()
         
         server_logger.info(f"Settings page accessed by user {current_user.username}")
         
@@ -64,6 +114,64 @@ def settings_page():
         return redirect(url_for('chatbot_advanced'))
 
 
+_TRUTHY = frozenset(('true', '1', 'on', 'yes'))
+_LOG_LEVELS = frozenset(('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'))
+_RESTART_SECTIONS = frozenset(('Server Host', 'Server Port', 'Debug Mode', 'Auto Reload'))
+
+
+def _to_bool(value):
+    return str(value).lower() in _TRUTHY
+
+
+def _mb_to_bytes(value):
+    return int(value) * 1048576
+
+
+# Settings form key -> (config path, parser, validator, section label,
+#                       message if the parser raises ValueError,
+#                       message if the validator rejects the value)
+# A parser of None stores the submitted value as-is.
+_HANDLERS = {
+    'server_host': ('server.host', None, None, 'Server Host', None, None),
+    'server_port': ('server.port', int, lambda port: 1 <= port <= 65535, 'Server Port',
+                    "Invalid port number", "Port must be between 1 and 65535"),
+    'debug_mode': ('server.debug', _to_bool, None, 'Debug Mode', None, None),
+    'auto_reload': ('server.auto_reload', _to_bool, None, 'Auto Reload', None, None),
+    'log_level': ('logging.level', None, _LOG_LEVELS.__contains__, 'Log Level', None, None),
+    'console_logging': ('logging.console_logging', _to_bool, None, 'Console Logging', None, None),
+    'max_log_size': ('logging.max_log_size', _mb_to_bytes, None, 'Max Log Size',
+                     "Invalid log file size", None),
+    'backup_count': ('logging.backup_count', int, lambda count: 1 <= count <= 20, 'Backup Count',
+                     "Invalid backup count", "Backup count must be between 1 and 20"),
+    'cache_enabled': ('performance.cache_enabled', _to_bool, None, 'Cache', None, None),
+    'compression_enabled': ('performance.compression_enabled', _to_bool, None, 'Compression', None, None),
+    'maintenance_mode': ('maintenance.maintenance_mode', _to_bool, None, 'Maintenance Mode', None, None),
+    'maintenance_message': ('maintenance.maintenance_message', None, None, 'Maintenance Message', None, None),
+}
+
+
+def _update_feature(config, feature_name, value):
+    config.set(f'features.{feature_name}', _to_bool(value))
+    return f'Feature: {feature_name}'
+
+
+def _update_logger_level(config, logger_name, value):
+    if value not in _LOG_LEVELS:
+        return None
+    # Convert 'root' to empty string for root logger
+    actual_logger_name = '' if logger_name == 'root' else logger_name
+    if _logging_manager.set_log_level(actual_logger_name, value):
+        return f'Logger: {logger_name}'
+    return None
+
+
+# (key prefix, update function returning the section label or None)
+_PREFIX_HANDLERS = (
+    ('feature_', _update_feature),
+    ('logger_level_', _update_logger_level),
+)
+
+
 def update_settings():
     """Update application settings"""
     if request.method != 'POST':
@@ -72,114 +180,43 @@ def update_settings():
     try:
         config = get_config()
         
-        # Get form data
-        form_data = request.form.to_dict()
-        json_data = request.get_json() if request.is_json else {}
-        
-        # Combine form and JSON data
-        updates = {**form_data, **json_data}
+        # Read updates from the request body: JSON, or the (unparsed-until-now) form.
+        # A JSON body never carries form fields, so there's nothing to merge.
+        if request.is_json:
+            updates = request.get_json(silent=True)
+            if not isinstance(updates, dict):
+                updates = {}
+        else:
+            updates = request.form
         
-        # Process different types of updates
+        # Process different types of updates, one pass over the submitted keys
         updated_sections = []
         
-        # Server settings
-        if 'server_host' in updates:
-            config.set('server.host', updates['server_host'])
-            updated_sections.append('Server Host')
-        
-        if 'server_port' in updates:
-            try:
-                port = int(updates['server_port'])
-                if 1 <= port <= 65535:
-                    config.set('server.port', port)
-                    updated_sections.append('Server Port')
-                else:
-                    flash("Port must be between 1 and 65535", "error")
-            except ValueError:
-                flash("Invalid port number", "error")
-        
-        if 'debug_mode' in updates:
-            debug = updates['debug_mode'].lower() in ['true', '1', 'on', 'yes']
-            config.set('server.debug', debug)
-            updated_sections.append('Debug Mode')
-        
-        if 'auto_reload' in updates:
-            auto_reload = updates['auto_reload'].lower() in ['true', '1', 'on', 'yes']
-            config.set('server.auto_reload', auto_reload)
-            updated_sections.append('Auto Reload')
-        
-        # Logging settings
-        logging_manager = LoggingConfigManager()
-        
-        if 'log_level' in updates:
-            valid_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
-            if updates['log_level'] in valid_levels:
-                config.set('logging.level', updates['log_level'])
-                updated_sections.append('Log Level')
-        
-        # Individual logger level updates
         for key, value in updates.items():
-            if key.startswith('logger_level_'):
-                logger_name = key.replace('logger_level_', '')
-                if value in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']:
-                    # Convert 'root' to empty string for root logger
-                    actual_logger_name = '' if logger_name == 'root' else logger_name
-                    if logging_manager.set_log_level(actual_logger_name, value):
-                        updated_sections.append(f'Logger: {logger_name}')
-        
-        if 'console_logging' in updates:
-            console_logging = updates['console_logging'].lower() in ['true', '1', 'on', 'yes']
-            config.set('logging.console_logging', console_logging)
-            updated_sections.append('Console Logging')
-        
-        if 'max_log_size' in updates:
-            try:
-                size_mb = int(updates['max_log_size'])
-                size_bytes = size_mb * 1048576  # Convert MB to bytes
-                config.set('logging.max_log_size', size_bytes)
-                updated_sections.append('Max Log Size')
-            except ValueError:
-                flash("Invalid log file size", "error")
-        
-        if 'backup_count' in updates:
-            try:
-                backup_count = int(updates['backup_count'])
-                if 1 <= backup_count <= 20:
-                    config.set('logging.backup_count', backup_count)
-                    updated_sections.append('Backup Count')
-                else:
-                    flash("Backup count must be between 1 and 20", "error")
-            except ValueError:
-                flash("Invalid backup count", "error")
-        
-        # Feature flags
-        feature_updates = {k: v for k, v in updates.items() if k.startswith('feature_')}
-        for feature_key, value in feature_updates.items():
-            feature_name = feature_key.replace('feature_', '')
-            enabled = value.lower() in ['true', '1', 'on', 'yes']
-            config.set(f'features.{feature_name}', enabled)
-            updated_sections.append(f'Feature: {feature_name}')
-        
-        # Performance settings
-        if 'cache_enabled' in updates:
-            cache_enabled = updates['cache_enabled'].lower() in ['true', '1', 'on', 'yes']
-            config.set('performance.cache_enabled', cache_enabled)
-            updated_sections.append('Cache')
-        
-        if 'compression_enabled' in updates:
-            compression = updates['compression_enabled'].lower() in ['true', '1', 'on', 'yes']
-            config.set('performance.compression_enabled', compression)
-            updated_sections.append('Compression')
-        
-        # Maintenance mode
-        if 'maintenance_mode' in updates:
-            maintenance = updates['maintenance_mode'].lower() in ['true', '1', 'on', 'yes']
-            config.set('maintenance.maintenance_mode', maintenance)
-            updated_sections.append('Maintenance Mode')
-        
-        if 'maintenance_message' in updates:
-            config.set('maintenance.maintenance_message', updates['maintenance_message'])
-            updated_sections.append('Maintenance Message')
+            handler = _HANDLERS.get(key)
+            if handler is not None:
+                path, parse, check, label, parse_error, check_error = handler
+                try:
+                    parsed = parse(value) if parse else value
+                except ValueError:
+                    flash(parse_error, "error")
+                    continue
+                if check and not check(parsed):
+                    if check_error:
+                        flash(check_error, "error")
+                    continue
+                config.set(path, parsed)
+                updated_sections.append(label)
+                continue
+            
+            for prefix, apply_update in _PREFIX_HANDLERS:
+                if key.startswith(prefix):
+                    label = apply_update(config, key[len(prefix):], value)
+                    if label:
+                        updated_sections.append(label)
+                    break
+        
+        _invalidate_logging_cache()
         
         # Save configuration
         if config.save():
@@ -190,14 +227,13 @@ def update_settings():
                 flash("No changes detected", "info")
             
             # Check if server restart is needed
-            restart_needed = any(section in ['Server Host', 'Server Port', 'Debug Mode', 'Auto Reload'] 
-                               for section in updated_sections)
+            restart_needed = any(section in _RESTART_SECTIONS for section in updated_sections)
             
             if restart_needed:
                 flash("⚠️ Server restart required for some changes to take effect", "warning")
             
             if request.is_json:
-                return jsonify({
+                return ojsonify({
                     "success": True,
                     "message": f"Settings updated: {', '.join(updated_sections)}",
                     "restart_needed": restart_needed
@@ -205,13 +241,13 @@ def update_settings():
         else:
             flash("Error saving settings", "error")
             if request.is_json:
-                return jsonify({"success": False, "error": "Error saving settings"})
+                return ojsonify({"success": False, "error": "Error saving settings"})
     
     except Exception as e:
         server_logger.error(f"Error updating settings: {e}")
         flash(f"Error updating settings: {str(e)}", "error")
         if request.is_json:
-            return jsonify({"success": False, "error": str(e)})
+            return ojsonify({"success": False, "error": str(e)})
     
     return redirect(url_for('settings_page'))
 
@@ -221,32 +257,26 @@ def get_settings_api():
     try:
         config = get_config()
         
-        return jsonify({
+        return ojsonify({
             "success": True,
-            "config": config.export_config(),
-            "server_info": {
-                'host': config.get('server.host'),
-                'port': config.get('server.port'),
-                'debug_mode': config.get('server.debug'),
-                'auto_reload': config.get('server.auto_reload'),
-                'is_production': config.is_production(),
-                'maintenance_mode': config.is_maintenance_mode()
-            },
-            "features": config.get_feature_flags()
+            "config": _exported_config(config._version),
+            "server_info": _server_info(config._version),
+            "features": _feature_flags(config._version)
         })
     
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
 
 
 def reset_settings():
     """Reset settings to defaults"""
+    config = get_config()
+    
+    # The reset swaps in a new dict and never mutates the old one,
+    # so holding on to it is enough to roll back
+    previous_config = config.config
+    
     try:
-        config = get_config()
-        
-        # Backup current config
-        backup_config = config.config.copy()
-        
         # Reset to defaults (reload from file or use built-in defaults)
         config.config = {}
         config._setup_defaults()
@@ -256,19 +286,22 @@ def reset_settings():
             server_logger.info(f"Settings reset to defaults by {current_user.username}")
             
             if request.is_json:
-                return jsonify({"success": True, "message": "Settings reset to defaults"})
+                return ojsonify({"success": True, "message": "Settings reset to defaults"})
         else:
-            # Restore backup on failure
-            config.config = backup_config
+            # Restore the previous settings on failure
+            config.config = previous_config
+            config.touch()
             flash("Error resetting settings", "error")
             if request.is_json:
-                return jsonify({"success": False, "error": "Error resetting settings"})
+                return ojsonify({"success": False, "error": "Error resetting settings"})
     
     except Exception as e:
+        config.config = previous_config
+        config.touch()
         server_logger.error(f"Error resetting settings: {e}")
         flash(f"Error resetting settings: {str(e)}", "error")
         if request.is_json:
-            return jsonify({"success": False, "error": str(e)})
+            return ojsonify({"success": False, "error": str(e)})
     
     return redirect(url_for('settings_page'))
 
@@ -284,18 +317,26 @@ def export_settings():
                 "version": config.get('app.version'),
                 "export_date": config.get('app.build_date')
             },
-            "config": config.export_config()
+            "config": _exported_config(config._version)
         }
         
-        return jsonify(export_data)
+        return ojsonify(export_data)
     
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
+
+
+# Largest settings file import_settings() will read (a real export is a few KB)
+MAX_IMPORT_SIZE = 2 * 1024 * 1024
 
 
 def import_settings():
     """Import settings from JSON"""
     try:
+        if request.content_length and request.content_length > MAX_IMPORT_SIZE:
+            flash("Configuration file is too large", "error")
+            return redirect(url_for('settings_page'))
+        
         if 'config_file' not in request.files:
             flash("No configuration file provided", "error")
             return redirect(url_for('settings_page'))
@@ -309,8 +350,14 @@ def import_settings():
             flash("Only JSON files are supported", "error")
             return redirect(url_for('settings_page'))
         
-        # Parse JSON
-        import_data = json.loads(file.read().decode('utf-8'))
+        # Read at most one byte past the limit (the header may be missing or wrong)
+        raw = file.stream.read(MAX_IMPORT_SIZE + 1)
+        if len(raw) > MAX_IMPORT_SIZE:
+            flash("Configuration file is too large", "error")
+            return redirect(url_for('settings_page'))
+        
+        # Parse JSON straight from the bytes
+        import_data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
         
         if 'config' not in import_data:
             flash("Invalid configuration file format", "error")
@@ -328,6 +375,7 @@ def import_settings():
         # Merge configurations
         config.config.update(imported_config)
         config._validate_config()
+        config.touch()
         
         if config.save():
             flash("Settings imported successfully", "success")
@@ -351,7 +399,7 @@ def restart_server():
         
         if config.is_production():
             flash("Server restart not available in production mode", "error")
-            return jsonify({"success": False, "error": "Not available in production"})
+            return ojsonify({"success": False, "error": "Not available in production"})
         
         # In development, we can trigger a restart by touching a file
         # This works with Flask's auto-reloader
@@ -374,39 +422,39 @@ def restart_server():
         flash("Server restart initiated", "info")
         server_logger.info(f"Server restart triggered by {current_user.username}")
         
-        return jsonify({"success": True, "message": "Server restart initiated"})
+        return ojsonify({"success": True, "message": "Server restart initiated"})
     
     except Exception as e:
         server_logger.error(f"Error restarting server: {e}")
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
 
 
 def get_logging_status():
     """API endpoint to get current logging status"""
     try:
-        logging_manager = LoggingConfigManager()
+        logging_config = _logging_config()
         
-        return jsonify({
+        return ojsonify({
             "success": True,
-            "log_levels": logging_manager.get_log_levels(),
-            "log_files": logging_manager.list_log_files(),
-            "config": logging_manager.load_config()
+            "log_levels": _logging_manager.get_log_levels(logging_config),
+            "log_files": _log_files(),
+            "config": logging_config
         })
     
     except Exception as e:
         server_logger.error(f"Error getting logging status: {e}")
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
 
 
 def rotate_logs():
     """API endpoint to rotate log files"""
     try:
-        logging_manager = LoggingConfigManager()
-        rotated_count = logging_manager.rotate_logs()
+        rotated_count = _logging_manager.rotate_logs()
+        _invalidate_logging_cache()
         
         server_logger.info(f"Log rotation triggered by {current_user.username}")
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "message": f"Rotated {rotated_count} log files",
             "rotated_count": rotated_count
@@ -414,7 +462,7 @@ def rotate_logs():
     
     except Exception as e:
         server_logger.error(f"Error rotating logs: {e}")
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
 
 
 def cleanup_logs():
@@ -423,24 +471,24 @@ def cleanup_logs():
         days_to_keep = int(request.args.get('days', 30))
         
         if days_to_keep < 1:
-            return jsonify({"success": False, "error": "Days must be at least 1"})
+            return ojsonify({"success": False, "error": "Days must be at least 1"})
         
-        logging_manager = LoggingConfigManager()
-        cleaned_count = logging_manager.cleanup_old_logs(days_to_keep)
+        cleaned_count = _logging_manager.cleanup_old_logs(days_to_keep)
+        _invalidate_logging_cache()
         
         server_logger.info(f"Log cleanup triggered by {current_user.username} - {cleaned_count} files removed")
         
-        return jsonify({
+        return ojsonify({
             "success": True,
             "message": f"Cleaned up {cleaned_count} old log files",
             "cleaned_count": cleaned_count
         })
     
     except ValueError:
-        return jsonify({"success": False, "error": "Invalid days parameter"})
+        return ojsonify({"success": False, "error": "Invalid days parameter"})
     except Exception as e:
         server_logger.error(f"Error cleaning up logs: {e}")
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
 
 
 def set_logger_level():
@@ -451,26 +499,25 @@ def set_logger_level():
         level = data.get('level', 'INFO')
         
         if level not in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']:
-            return jsonify({"success": False, "error": "Invalid log level"})
-        
-        logging_manager = LoggingConfigManager()
+            return ojsonify({"success": False, "error": "Invalid log level"})
         
         # Convert 'root' to empty string for root logger
         actual_logger_name = '' if logger_name == 'root' else logger_name
         
-        if logging_manager.set_log_level(actual_logger_name, level):
+        if _logging_manager.set_log_level(actual_logger_name, level):
+            _invalidate_logging_cache()
             server_logger.info(f"Log level changed by {current_user.username}: {logger_name} -> {level}")
             
-            return jsonify({
+            return ojsonify({
                 "success": True,
                 "message": f"Set {logger_name or 'root'} log level to {level}"
             })
         else:
-            return jsonify({"success": False, "error": "Failed to set log level"})
+            return ojsonify({"success": False, "error": "Failed to set log level"})
     
     except Exception as e:
         server_logger.error(f"Error setting logger level: {e}")
-        return jsonify({"success": False, "error": str(e)})
+        return ojsonify({"success": False, "error": str(e)})
 
 
 def download_log_file():
@@ -478,19 +525,24 @@ def download_log_file():
     try:
         filename = request.args.get('filename')
         if not filename:
-            return jsonify({"success": False, "error": "No filename provided"})
-        
-        logging_manager = LoggingConfigManager()
-        log_files = logging_manager.list_log_files()
+            return ojsonify({"success": False, "error": "No filename provided"})
         
-        if filename not in log_files:
-            return jsonify({"success": False, "error": "Log file not found"})
+        # Resolve the name directly inside the logs directory (one stat, no listing).
+        # Only bare *.log names are served, the same set list_log_files() shows.
+        log_file_path = None
+        if filename.endswith('.log') and os.path.basename(filename) == filename:
+            log_file_path = safe_join(str(_logging_manager.logs_dir), filename)
         
-        log_file_path = log_files[filename]['path']
+        if not log_file_path or not os.path.isfile(log_file_path):
+            return ojsonify({"success": False, "error": "Log file not found"}, 404)
         
+        # Conditional so a re-download of an unchanged log is a 304; with
+        # server.use_x_sendfile the web server streams the file instead of Python
         from flask import send_file
-        return send_file(log_file_path, as_attachment=True, download_name=filename)
+        return send_file(log_file_path, as_attachment=True, download_name=filename,
+                         conditional=True, etag=True,
+                         last_modified=os.path.getmtime(log_file_path))
     
     except Exception as e:
         server_logger.error(f"Error downloading log file: {e}")
-        return jsonify({"success": False, "error": str(e)})
\ No newline at end of file
+        return ojsonify({"success": False, "error": str(e)})
\ No newline at end of file
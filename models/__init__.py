@@ -1,6 +1,7 @@
 from .user import User
 from .chat import (
-    get_user_chat_history, save_user_chat_history, 
+    get_user_chat_history, get_user_chat_history_page, 
+    save_user_chat_history, 
     get_user_chat_sessions, delete_user_chat_session, 
     clear_user_chat_history
 )
@@ -11,7 +12,8 @@ from .analytics import Analytics
 
 __all__ = [
     'User',
-    'get_user_chat_history', 'save_user_chat_history', 
+    'get_user_chat_history', 'get_user_chat_history_page', 
+    'save_user_chat_history', 
     'get_user_chat_sessions', 'delete_user_chat_session', 
     'clear_user_chat_history',
     'get_db_connection', 'init_db', 'get_user_data_dir',
@@ -40,6 +40,40 @@ def get_user_chat_history(user_id, mode, session_id=None, limit=50):
         return []
 
 
+@log_function_call(chat_logger)
+def get_user_chat_history_page(user_id, mode, session_id, limit=10):
+    """Get the most recent `limit` exchanges of a chat session, oldest first.
+    
+    Unlike get_user_chat_history, the LIMIT selects the newest rows in SQL so
+    callers that only need a recent window never load the whole session.
+    """
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT query, response FROM chat_history 
+            WHERE user_id = ? AND mode = ? AND session_id = ?
+            ORDER BY id DESC LIMIT ?
+        """, (user_id, mode, session_id, limit))
+        
+        rows = cur.fetchall()
+        conn.close()
+        
+        history = []
+        for row in reversed(rows):
+            history.append({"role": "user", "content": row[0]})
+            history.append({"role": "assistant", "content": row[1]})
+        
+        chat_logger.info(f"Retrieved {len(rows)} recent exchanges for user {user_id}, mode {mode}, session {session_id}")
+        log_database_activity("SELECT", "chat_history", len(rows), user_id)
+        return history
+        
+    except Exception as e:
+        log_error(e, f"Failed to get chat history page for user {user_id}")
+        return []
+
+
 @log_function_call(chat_logger, log_args=False)  # Don't log full query/response content
 def save_user_chat_history(user_id, session_id, mode, query, response):
     """Save user chat interaction to database"""
@@ -14,6 +14,8 @@ def get_db_connection():
     """Get fresh database connection"""
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    # WAL (set once in init_db) makes NORMAL sync durable enough and much cheaper per commit
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
 
 def init_db():
@@ -21,6 +23,9 @@ def init_db():
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
     
+    # Write-ahead log: readers don't block the scraper's batch inserts (persistent setting)
+    cur.execute("PRAGMA journal_mode=WAL")
+    
     # Users table
     cur.execute("""
     CREATE TABLE IF NOT EXISTS users (
@@ -56,6 +61,20 @@ def init_db():
     )
     """)
     
+    # Last scrape of each topic per user/company, to skip re-scraping unchanged topics
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS topic_state (
+        topic_url TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        company_id TEXT NOT NULL,
+        highest_post_number INTEGER,
+        max_posts INTEGER,
+        descending BOOLEAN,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (topic_url, user_id, company_id)
+    )
+    """)
+    
     # Posts table (user-specific data)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS posts (
@@ -136,6 +155,12 @@ def init_db():
     )
     """)
     
+    # Covers the per-session history lookups; rowid ordering comes from the index itself
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_chat_history_user_mode_session
+    ON chat_history (user_id, mode, session_id)
+    """)
+    
     # Issues tables (shared data - no user_id needed)
     cur.execute("""
     CREATE TABLE IF NOT EXISTS issues (
@@ -190,6 +215,22 @@ def init_db():
         cur.execute("ALTER TABLE posts ADD COLUMN company_id TEXT DEFAULT 'haval'")
         print("✅ Added company_id column to posts table")
 
+    # One row per (user, company, topic, post): lets inserts dedupe with INSERT OR IGNORE.
+    # Drop duplicates left by older versions first, keeping the earliest copy.
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_posts_dedupe'")
+    if cur.fetchone() is None:
+        print("Removing duplicate posts and adding unique index...")
+        cur.execute("""
+        DELETE FROM posts WHERE id NOT IN (
+            SELECT MIN(id) FROM posts GROUP BY user_id, company_id, topic_url, post_number
+        )
+        """)
+        cur.execute("""
+        CREATE UNIQUE INDEX ux_posts_dedupe
+        ON posts(user_id, company_id, topic_url, post_number)
+        """)
+        print("✅ Added unique index on posts")
+
     try:
         cur.execute("SELECT company_id FROM search_results LIMIT 1")
     except sqlite3.OperationalError:
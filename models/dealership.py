@@ -4,12 +4,80 @@ Handles all dealership-related data including warranty claims, campaigns, inspec
 """
 
 import sqlite3
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from utils.logger import dealership_logger, log_function_call
 import json
 import re
 
+# Tables whose rows count towards a dealership's activity on the dashboard
+ACTIVITY_TABLES = ('warranty_claims', 'pdi_inspections', 'repair_orders')
+
+class SQLiteConnectionPool:
+    """
+    Small thread-safe pool of reusable SQLite connections for one database file.
+    
+    Reusing connections keeps SQLite's per-connection page cache warm across
+    requests instead of reopening the file every time.
+    """
+    
+    def __init__(self, db_path: str, size: int = 5):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue(maxsize=size)
+    
+    # Per-connection tuning, applied once when the pool opens a connection.
+    # journal_mode=WAL is persistent and set by init_database(); the rest are not.
+    CONNECTION_PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-65536",       # 64 MB page cache
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",     # 256 MB
+    )
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection; commits on success, rolls back on error, then returns it to the pool"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        
+        # Callers choose their own row factory per checkout
+        conn.row_factory = None
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str) -> SQLiteConnectionPool:
+    """Return the shared connection pool for a database file"""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = _pools[db_path] = SQLiteConnectionPool(db_path)
+    return pool
+
+
 class DealershipDatabase:
     """Database operations for dealership management system"""
     
@@ -17,12 +85,20 @@ class DealershipDatabase:
         self.db_path = db_path
         self.init_database()
     
+    def connection(self):
+        """Pooled connection context manager for this database"""
+        return get_connection_pool(self.db_path).connection()
+    
     @log_function_call(dealership_logger)
     def init_database(self):
         """Initialize all dealership-related tables"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            # WAL lets dashboard reads proceed while the seeder/other writers commit;
+            # the journal mode is persistent, so setting it here covers every connection
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # Technical Reports / Warranty Claims Table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS warranty_claims (
@@ -205,10 +281,242 @@ class DealershipDatabase:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdi_vin ON pdi_inspections(vin_number)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_ro_vin ON repair_orders(vin_number)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_ro_number ON repair_orders(ro_number)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdi_dealership ON pdi_inspections(dealership_name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ro_dealership ON repair_orders(dealership_name)")
+            
+            # Composite indexes matching the listing pages' filters + ORDER BY date DESC
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_cs_date_campaign'")
+            listing_indexes_exist = cursor.fetchone() is not None
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_wc_date_dealer ON warranty_claims(claim_date DESC, dealership_name, claim_type)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ffs_date_dealer ON ffs_inspections(inspection_date DESC, dealership_name, vin_number)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sfs_date_dealer ON sfs_inspections(inspection_date DESC, dealership_name, vin_number)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ro_date_dealer ON repair_orders(ro_date DESC, dealership_name, status, vin_number)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cs_date_campaign ON campaign_services(service_date DESC, campaign_id, dealership_name)")
+            if not listing_indexes_exist:
+                # Give the planner statistics for the new indexes (only needed once)
+                cursor.execute("ANALYZE")
+            
+            self._init_activity_counts(cursor)
+            self._init_tyre_complaints_rollup(cursor)
+            self.ro_number_fts = self._init_ro_number_search(cursor)
             
             conn.commit()
             dealership_logger.info("Dealership database initialized successfully")
 
+    def _init_activity_counts(self, cursor):
+        """
+        Per-dealership activity counts across warranty claims, PDIs and repair orders.
+        
+        SQLite has no materialized views, so this is a plain table backfilled once
+        from the source tables and kept current by insert/update/delete triggers.
+        """
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master 
+            WHERE type = 'table' AND name = 'mv_dealership_activity'
+        """)
+        already_built = cursor.fetchone() is not None
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mv_dealership_activity (
+                dealership_name TEXT PRIMARY KEY,
+                activity_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        if not already_built:
+            # Each branch counts from its dealership_name index (index-only scan)
+            # before the per-table counts are summed
+            cursor.execute("""
+                WITH per_table AS (
+                    SELECT dealership_name, COUNT(*) AS c FROM warranty_claims GROUP BY dealership_name
+                    UNION ALL
+                    SELECT dealership_name, COUNT(*) FROM pdi_inspections GROUP BY dealership_name
+                    UNION ALL
+                    SELECT dealership_name, COUNT(*) FROM repair_orders GROUP BY dealership_name
+                )
+                INSERT INTO mv_dealership_activity (dealership_name, activity_count)
+                SELECT dealership_name, SUM(c)
+                FROM per_table
+                GROUP BY dealership_name
+            """)
+        
+        for table in ACTIVITY_TABLES:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_activity_insert
+                AFTER INSERT ON {table}
+                BEGIN
+                    INSERT INTO mv_dealership_activity (dealership_name, activity_count)
+                    VALUES (NEW.dealership_name, 1)
+                    ON CONFLICT(dealership_name) DO UPDATE SET activity_count = activity_count + 1;
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_activity_delete
+                AFTER DELETE ON {table}
+                BEGIN
+                    UPDATE mv_dealership_activity SET activity_count = activity_count - 1
+                    WHERE dealership_name = OLD.dealership_name;
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_activity_update
+                AFTER UPDATE OF dealership_name ON {table}
+                WHEN OLD.dealership_name <> NEW.dealership_name
+                BEGIN
+                    UPDATE mv_dealership_activity SET activity_count = activity_count - 1
+                    WHERE dealership_name = OLD.dealership_name;
+                    INSERT INTO mv_dealership_activity (dealership_name, activity_count)
+                    VALUES (NEW.dealership_name, 1)
+                    ON CONFLICT(dealership_name) DO UPDATE SET activity_count = activity_count + 1;
+                END
+            """)
+
+    def _init_tyre_complaints_rollup(self, cursor):
+        """
+        Monthly tyre complaint counts per dealership and car model, backing
+        WarrantyClaim.get_tyre_complaints_by_month().
+        
+        Built and maintained the same way as mv_dealership_activity.
+        """
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master 
+            WHERE type = 'table' AND name = 'mv_tyre_complaints_monthly'
+        """)
+        already_built = cursor.fetchone() is not None
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mv_tyre_complaints_monthly (
+                year TEXT NOT NULL,
+                month TEXT NOT NULL,
+                dealership_name TEXT NOT NULL,
+                car_model TEXT NOT NULL,
+                complaint_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (year, month, dealership_name, car_model)
+            )
+        """)
+        
+        if not already_built:
+            cursor.execute("""
+                INSERT INTO mv_tyre_complaints_monthly (year, month, dealership_name, car_model, complaint_count)
+                SELECT strftime('%Y', claim_date), strftime('%m', claim_date),
+                       dealership_name, car_model, COUNT(*)
+                FROM warranty_claims
+                WHERE claim_type LIKE '%tyre%' AND strftime('%Y', claim_date) IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+            """)
+        
+        # `row` is NEW or OLD; a claim counts when it is a tyre claim with a valid date
+        def counts(row):
+            return f"{row}.claim_type LIKE '%tyre%' AND strftime('%Y', {row}.claim_date) IS NOT NULL"
+        
+        def increment(row):
+            return f"""
+                INSERT INTO mv_tyre_complaints_monthly (year, month, dealership_name, car_model, complaint_count)
+                SELECT strftime('%Y', {row}.claim_date), strftime('%m', {row}.claim_date),
+                       {row}.dealership_name, {row}.car_model, 1
+                WHERE {counts(row)}
+                ON CONFLICT(year, month, dealership_name, car_model)
+                DO UPDATE SET complaint_count = complaint_count + 1;
+            """
+        
+        def decrement(row):
+            key = f"""
+                year = strftime('%Y', {row}.claim_date) AND month = strftime('%m', {row}.claim_date)
+                AND dealership_name = {row}.dealership_name AND car_model = {row}.car_model
+            """
+            return f"""
+                UPDATE mv_tyre_complaints_monthly SET complaint_count = complaint_count - 1
+                WHERE {counts(row)} AND {key};
+                DELETE FROM mv_tyre_complaints_monthly WHERE complaint_count <= 0 AND {key};
+            """
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_warranty_claims_tyre_insert
+            AFTER INSERT ON warranty_claims
+            BEGIN
+                {increment('NEW')}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_warranty_claims_tyre_delete
+            AFTER DELETE ON warranty_claims
+            BEGIN
+                {decrement('OLD')}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_warranty_claims_tyre_update
+            AFTER UPDATE OF claim_type, claim_date, dealership_name, car_model ON warranty_claims
+            BEGIN
+                {decrement('OLD')}
+                {increment('NEW')}
+            END
+        """)
+
+    def _init_ro_number_search(self, cursor) -> bool:
+        """
+        Trigram FTS5 index over repair_orders.ro_number so substring searches
+        (the RO number filter) don't need a full-scan LIKE '%...%'.
+        
+        Returns False when this SQLite build lacks FTS5/trigram; callers then fall back to LIKE.
+        """
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master 
+            WHERE type = 'table' AND name = 'repair_orders_fts'
+        """)
+        already_built = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS repair_orders_fts USING fts5(
+                    ro_number, content='repair_orders', content_rowid='id', tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            dealership_logger.warning(f"RO number full-text search unavailable, using LIKE: {str(e)}")
+            return False
+        
+        if not already_built:
+            cursor.execute("INSERT INTO repair_orders_fts(repair_orders_fts) VALUES ('rebuild')")
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_repair_orders_fts_insert
+            AFTER INSERT ON repair_orders
+            BEGIN
+                INSERT INTO repair_orders_fts(rowid, ro_number) VALUES (NEW.id, NEW.ro_number);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_repair_orders_fts_delete
+            AFTER DELETE ON repair_orders
+            BEGIN
+                INSERT INTO repair_orders_fts(repair_orders_fts, rowid, ro_number) VALUES ('delete', OLD.id, OLD.ro_number);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_repair_orders_fts_update
+            AFTER UPDATE OF ro_number ON repair_orders
+            BEGIN
+                INSERT INTO repair_orders_fts(repair_orders_fts, rowid, ro_number) VALUES ('delete', OLD.id, OLD.ro_number);
+                INSERT INTO repair_orders_fts(rowid, ro_number) VALUES (NEW.id, NEW.ro_number);
+            END
+        """)
+        return True
+
+_default_db: Optional[DealershipDatabase] = None
+_default_db_lock = threading.Lock()
+
+
+def get_dealership_db() -> DealershipDatabase:
+    """Shared DealershipDatabase for the app; schema setup runs once, on first use"""
+    global _default_db
+    if _default_db is None:
+        with _default_db_lock:
+            if _default_db is None:
+                _default_db = DealershipDatabase()
+    return _default_db
+
+
 class WarrantyClaim:
     """Warranty Claims operations"""
     
@@ -216,8 +524,8 @@ class WarrantyClaim:
     @log_function_call(dealership_logger)
     def get_claims_by_vin(vin_number: str) -> List[Dict]:
         """Get all warranty claims for a specific VIN"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -233,8 +541,8 @@ class WarrantyClaim:
     @log_function_call(dealership_logger)
     def get_most_complained_vins(limit: int = 10) -> List[Dict]:
         """Get VIN numbers with most complaints"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -254,8 +562,8 @@ class WarrantyClaim:
     @log_function_call(dealership_logger)
     def get_dealership_complaints(dealership_name: str = None, date_from: str = None, date_to: str = None) -> List[Dict]:
         """Get complaints by dealership with optional date filtering"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -289,19 +597,18 @@ class WarrantyClaim:
     @log_function_call(dealership_logger)
     def get_tyre_complaints_by_month(year: int, month: int) -> Dict:
         """Get tyre-related complaints for specific month"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
+            # Served from the trigger-maintained monthly rollup instead of scanning claims
             cursor.execute("""
-                SELECT COUNT(*) as tyre_complaints,
+                SELECT COALESCE(SUM(complaint_count), 0) as tyre_complaints,
                        GROUP_CONCAT(DISTINCT dealership_name) as dealerships,
                        GROUP_CONCAT(DISTINCT car_model) as models
-                FROM warranty_claims 
-                WHERE claim_type LIKE '%tyre%' 
-                AND strftime('%Y', claim_date) = ? 
-                AND strftime('%m', claim_date) = ?
+                FROM mv_tyre_complaints_monthly 
+                WHERE year = ? AND month = ?
             """, (str(year), f"{month:02d}"))
             
             result = cursor.fetchone()
@@ -314,8 +621,8 @@ class CampaignService:
     @log_function_call(dealership_logger)
     def get_campaign_stats(campaign_id: str = None, dealership_name: str = None) -> Dict:
         """Get campaign statistics"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -349,7 +656,7 @@ class InspectionService:
     @log_function_call(dealership_logger)
     def get_vin_complete_history(vin_number: str) -> Dict:
         """Get complete history for a VIN number"""
-        db = DealershipDatabase()
+        db = get_dealership_db()
         history = {
             'vin_number': vin_number,
             'vehicle_info': {},
@@ -361,7 +668,7 @@ class InspectionService:
             'repair_orders': []
         }
         
-        with sqlite3.connect(db.db_path) as conn:
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -409,8 +716,8 @@ class InspectionService:
     @log_function_call(dealership_logger)
     def get_pdi_statistics(dealership_name: str = None, date_from: str = None, date_to: str = None) -> Dict:
         """Get PDI inspection statistics"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -462,8 +769,8 @@ class RepairOrder:
     @log_function_call(dealership_logger)
     def get_ro_by_vin(vin_number: str) -> List[Dict]:
         """Get all repair orders for a VIN"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -479,8 +786,8 @@ class RepairOrder:
     @log_function_call(dealership_logger)
     def get_ro_statistics(dealership_name: str = None) -> Dict:
         """Get repair order statistics"""
-        db = DealershipDatabase()
-        with sqlite3.connect(db.db_path) as conn:
+        db = get_dealership_db()
+        with db.connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
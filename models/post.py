@@ -1,8 +1,31 @@
+import hashlib
+import re
 from .database import get_db_connection
-from bs4 import BeautifulSoup
+from utils.html_text import post_text
 from tqdm import tqdm
 
 
+# Fixed SQL text, so sqlite3's per-connection statement cache reuses the
+# compiled statements when one connection saves many topics
+_SQL_SELECT_EXISTING = """
+    SELECT post_number FROM posts
+    WHERE topic_url = ? AND user_id = ? AND company_id = ?
+"""
+_SQL_INSERT_POST = """
+    INSERT OR IGNORE INTO posts (user_id, company_id, category, topic_title, topic_url, post_number, author, created_at, cooked_text)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Markup and digits are ignored when comparing post contents for dedupe_content
+_CONTENT_NOISE_RE = re.compile(r"<[^>]+>|\d+")
+
+
+def _content_signature(html):
+    """Digest of a post's cooked HTML with tags, digits, case and spacing normalized away"""
+    text = " ".join(_CONTENT_NOISE_RE.sub(" ", html or "").lower().split())
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() if text else None
+
+
 class Post:
     def __init__(self, id=None, user_id=None, company_id=None, category=None, 
                  topic_title=None, topic_url=None, post_number=None, 
@@ -20,42 +43,58 @@ class Post:
         self.scraped_at = scraped_at
 
     @staticmethod
-    def save_posts_to_db(category_name, topic_title, topic_url, posts, user_id, company_id):
-        """Save posts to database"""
-        conn = get_db_connection()
+    def save_posts_to_db(category_name, topic_title, topic_url, posts, user_id, company_id, conn=None,
+                         dedupe_content=False):
+        """
+        Save posts to database. With `conn`, use that connection and leave the
+        commit/close to the caller (e.g. one transaction for a whole scraping run);
+        otherwise open, commit and close a connection here. With `dedupe_content`,
+        posts whose normalized content repeats an earlier post in this batch
+        (copy-pasted or bot replies) are skipped too.
+        """
+        own_conn = conn is None
+        if own_conn:
+            conn = get_db_connection()
         cur = conn.cursor()
         
-        saved_count = 0
+        # Post numbers of this topic already stored for this user and company, in one query
+        cur.execute(_SQL_SELECT_EXISTING, (topic_url, user_id, company_id))
+        existing = {row[0] for row in cur.fetchall()}
+        
+        rows = []
         skipped_count = 0
+        seen_signatures = set()
 
         print(f"💾 Saving {len(posts)} posts to database...")
         for p in tqdm(posts, desc="💾 Saving posts", unit="post", ncols=100):
             post_number = p.get("post_number")
-
-            # Check if post already exists for this user and company
-            cur.execute("""
-                SELECT COUNT(*) FROM posts 
-                WHERE post_number = ? AND topic_url = ? AND user_id = ? AND company_id = ?
-            """, (post_number, topic_url, user_id, company_id))
-            
-            exists = cur.fetchone()[0] > 0
-            
-            if exists:
+            if post_number in existing:
                 skipped_count += 1
                 continue
+            existing.add(post_number)
             
-            text = p.get("cooked") or ""
-            # store raw cooked HTML and also store plain text trimmed
-            plain = BeautifulSoup(text, "lxml").get_text(" ", strip=True) if text else ""
+            if dedupe_content:
+                signature = _content_signature(p.get("cooked"))
+                if signature is not None:
+                    if signature in seen_signatures:
+                        skipped_count += 1
+                        continue
+                    seen_signatures.add(signature)
             
-            cur.execute("""
-                INSERT INTO posts (user_id, company_id, category, topic_title, topic_url, post_number, author, created_at, cooked_text)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, company_id, category_name, topic_title, topic_url, post_number, p.get("username"), p.get("created_at"), plain))
-            saved_count += 1
-        
-        conn.commit()
-        conn.close()
+            # store raw cooked HTML and also store plain text trimmed
+            plain = post_text(p)
+            rows.append((user_id, company_id, category_name, topic_title, topic_url, post_number,
+                         p.get("username"), p.get("created_at"), plain))
+        
+        # One transaction for the whole topic; the unique index drops posts another
+        # scrape stored since the existence query
+        cur.executemany(_SQL_INSERT_POST, rows)
+        saved_count = max(cur.rowcount, 0)
+        skipped_count += len(rows) - saved_count
+        
+        if own_conn:
+            conn.commit()
+            conn.close()
         
         return saved_count, skipped_count
 
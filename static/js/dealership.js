@@ -618,12 +618,17 @@ function exportData(type, format = 'csv') {
     
     // Make API call to export data
     fetch(`/api/dealership/export?type=${type}&format=${format}`)
-        .then(response => response.json())
+        .then(response => {
+            // Successful exports are streamed as a CSV file; errors come back as JSON
+            if (response.ok) {
+                return response.blob().then(blob => ({ success: true, blob }));
+            }
+            return response.json();
+        })
         .then(data => {
             if (data.success) {
                 // Create download link
-                const blob = new Blob([data.csv_data], { type: 'text/csv' });
-                const url = window.URL.createObjectURL(blob);
+                const url = window.URL.createObjectURL(data.blob);
                 const a = document.createElement('a');
                 a.href = url;
                 a.download = `${type}_${new Date().toISOString().split('T')[0]}.csv`;
@@ -0,0 +1,45 @@
+"""
+In-process caching helpers for slow-changing data (dashboard aggregates,
+reference lists) that is fine to serve a few seconds stale but expensive to
+recompute on every request.
+"""
+
+import functools
+import threading
+import time
+
+
+def ttl_cache(seconds, maxsize=128):
+    """
+    Memoize a function's return value for `seconds`, keyed by its arguments.
+
+    - Exceptions are not cached
+    - Cached values are shared between callers; treat them as read-only
+    - The wrapped function gains `cache_clear()` to drop all entries (e.g. after a write)
+    """
+    def decorator(fn):
+        entries = {}
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            now = time.monotonic()
+            entry = entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+            value = fn(*args, **kwargs)
+            with lock:
+                if key not in entries and len(entries) >= maxsize:
+                    entries.pop(next(iter(entries)))
+                entries[key] = (now + seconds, value)
+            return value
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
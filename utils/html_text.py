@@ -0,0 +1,30 @@
+"""
+HTML to plain text for scraped forum posts.
+
+`cooked_to_text()` uses selectolax (a C HTML parser, many times faster than
+BeautifulSoup for plain text extraction) when it is installed.
+"""
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.parser import HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+
+def cooked_to_text(html: str) -> str:
+    """Text content of a post's cooked HTML, pieces joined by single spaces"""
+    if not html:
+        return ""
+    if HAS_SELECTOLAX:
+        return HTMLParser(html).text(separator=" ", strip=True)
+    return BeautifulSoup(html, "lxml").get_text(" ", strip=True)
+
+
+def post_text(post: dict) -> str:
+    """A scraped post's plain text: its precomputed "plain_text", else stripped from "cooked" """
+    if "plain_text" in post:
+        return post["plain_text"]
+    return cooked_to_text(post.get("cooked") or "")
@@ -0,0 +1,24 @@
+"""
+JSON response helper shared by the API controllers.
+
+`ojsonify()` is a drop-in for `flask.jsonify()` that encodes with orjson
+(much faster on large lists of dicts) when it is installed.
+"""
+
+from flask import Response, jsonify
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def ojsonify(payload, status=200) -> Response:
+    """Serialize `payload` into a JSON response, with orjson when available"""
+    if HAS_ORJSON:
+        return Response(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+                        status=status, mimetype='application/json')
+    response = jsonify(payload)
+    response.status_code = status
+    return response
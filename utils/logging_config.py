@@ -255,12 +255,13 @@ class LoggingConfigManager:
             print(f"❌ Error setting log level: {e}")
             return False
     
-    def get_log_levels(self) -> Dict[str, str]:
-        """Get current log levels for all loggers"""
+    def get_log_levels(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Get current log levels for all loggers (named in `config`, loaded if not given)"""
         levels = {}
         
         # Get all configured loggers
-        config = self.load_config()
+        if config is None:
+            config = self.load_config()
         loggers = config.get('loggers', {})
         
         for logger_name in loggers.keys():
@@ -0,0 +1,17 @@
+"""
+Request argument parsing helpers shared by the controllers.
+"""
+
+from typing import Optional
+
+
+def safe_int(value, default: int, lo: int = 1, hi: Optional[int] = 10000) -> int:
+    """
+    `value` (a query/form string) as an int clamped to [lo, hi], or `default`
+    when it is missing or not a number. hi=None leaves the upper end open.
+    """
+    try:
+        number = max(lo, int(value))
+    except (TypeError, ValueError):
+        return default
+    return number if hi is None else min(hi, number)